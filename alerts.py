@@ -0,0 +1,66 @@
+# --- 到價提醒：規則依代碼建索引，只評估報價有變動的代碼，整批向量化判斷 ---
+# 雲端 alerts 清單每筆格式為「代碼|種類|門檻」，例如 2330.TW|above|600
+import numpy as np
+import pandas as pd
+
+SEP = "|"
+KINDS = {
+    "above": "股價 ≥",
+    "below": "股價 ≤",
+    "move": "漲跌幅 ≥ (%)",
+    "volume": "成交量 ≥ 均量 (倍)",
+}
+RULE_COLUMNS = ["kind", "level", "entry"]
+
+
+def parse_rule(entry):
+    parts = [p.strip() for p in str(entry).split(SEP)]
+    if len(parts) != 3 or parts[1] not in KINDS: return None
+    try: return parts[0], parts[1], float(parts[2])
+    except ValueError: return None
+
+
+def format_rule(symbol, kind, level):
+    if not symbol or kind not in KINDS: return None
+    return f"{symbol}{SEP}{kind}{SEP}{level:g}"
+
+
+def describe(symbol_name, kind, level):
+    return f"{symbol_name} {KINDS[kind]} {level:g}"
+
+
+class RuleIndex:
+    def __init__(self, entries):
+        rows = [(*r, e) for e in entries or [] if (r := parse_rule(e))]
+        df = pd.DataFrame(rows, columns=["full_code", *RULE_COLUMNS])
+        # 依代碼排序的索引：只取有變動代碼的規則時是二分搜尋，不用掃過全部規則
+        self.rules = df.set_index("full_code").sort_index()
+
+    @property
+    def symbols(self):
+        return self.rules.index.unique().tolist()
+
+    def evaluate(self, quotes_df, symbols=None):
+        rules = self.rules if symbols is None else self.rules.loc[self.rules.index.intersection(list(symbols))]
+        if rules.empty or quotes_df.empty: return rules.iloc[0:0]
+        df = rules.join(quotes_df[["last", "pct", "volume", "avg_volume"]], how="inner")
+        kind, level = df["kind"].to_numpy(), df["level"].to_numpy()
+        hit = np.select(
+            [kind == "above", kind == "below", kind == "move", kind == "volume"],
+            [df["last"] >= level, df["last"] <= level, df["pct"].abs() >= level,
+             df["volume"] >= level * df["avg_volume"]],
+            default=False)
+        return df[hit.astype(bool)]
+
+
+def changed_symbols(quotes_df, previous):
+    # previous: {代碼: (最新價, 成交量)}；回傳這批報價裡有變動 (或第一次看到) 的代碼
+    if quotes_df.empty: return []
+    prev = pd.DataFrame.from_dict(previous, orient="index", columns=["last", "volume"]) if previous else pd.DataFrame(columns=["last", "volume"])
+    prev = prev.reindex(quotes_df.index)
+    mask = quotes_df["last"].ne(prev["last"]) | quotes_df["volume"].ne(prev["volume"])
+    return quotes_df.index[mask].tolist()
+
+
+def snapshot(quotes_df):
+    return {s: (r[0], r[1]) for s, r in zip(quotes_df.index, quotes_df[["last", "volume"]].to_numpy())}
@@ -1,23 +1,34 @@
+import time
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import feedparser
-import requests
-from deep_translator import GoogleTranslator
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
-import urllib.parse
+import quotes
+import news
+import fundamentals
+import price_store
+import portfolio
+import alerts
+import render
+import ranking
+from symbols import symbol_index
+from refresher import refresher, market_phase, INTERVALS
+from gas_client import gas
+from metrics import registry as perf
+from translate import translator
+from data_service import service
+from config import TW_TZ
 
 # --- 1. 頁面設定 ---
+_page_start = time.perf_counter()
 st.set_page_config(layout="wide", page_title="阿美的股海顧問", initial_sidebar_state="collapsed")
 st_autorefresh(interval=5 * 60 * 1000, key="auto_refresh")
+refresher.start()
 
-TW_TZ = timezone(timedelta(hours=8))
 def get_tw_time():
     return datetime.now(TW_TZ).strftime('%Y-%m-%d %H:%M')
 
-# --- 2. GAS API ---
-GAS_URL = "https://script.google.com/macros/s/AKfycbwTsM79MMdedizvIcIn7tgwT81VIhj87WM-bvR45QgmMIUsIemmyR_FzMvG3v5LEHEvPw/exec"
+# --- 2. GAS API (見 gas_client.py) ---
 
 # --- 3. CSS 視覺優化 (8欄/4欄 + 緊湊版面) ---
 st.markdown("""
@@ -56,13 +67,17 @@ div[data-testid="column"] { min-width: 85px !important; flex: 1 1 auto !importan
 .compact-name, .opinion-name, .tech-name { font-size: 13px !important; font-weight: 700; margin: 0; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; color: #37474f;}
 .compact-price { font-size: 18px !important; font-weight: 800; margin: 2px 0 0 0; letter-spacing: -0.5px; font-family: "Segoe UI", sans-serif;}
 
-/* 隱形刪除鈕 */
-div[data-testid="column"] .stButton > button {
-    width: 100%; border: none !important; background: transparent !important;
-    color: #f5f5f5 !important; font-size: 10px !important; padding: 0 !important;
-    height: 14px !important; margin-top: -2px !important; 
-}
-div[data-testid="column"] .stButton > button:hover { color: #ef5350 !important; font-weight: bold; background: rgba(255, 235, 238, 0.5) !important; }
+/* 庫存損益 */
+.pnl-line { font-size: 11px; font-weight: 600; min-height: 14px; }
+
+/* 迷你走勢圖 */
+.spark { display: block; margin: 2px auto 0 auto; max-width: 90px; opacity: 0.8; }
+
+/* 卡片格線 (電腦8欄 / 手機4欄) */
+.card-grid { display: grid; grid-template-columns: repeat(8, minmax(0, 1fr)); gap: 4px; margin-bottom: 6px; }
+@media (max-width: 640px) { .card-grid { grid-template-columns: repeat(4, minmax(0, 1fr)); } }
+.flash { animation: flash 1.2s ease-out; }
+@keyframes flash { from { background: #fff8e1; } to { background: inherit; } }
 
 /* 區塊標題 */
 .section-header { font-size: 16px; font-weight: 900; color: #37474f; padding: 8px 0; border-bottom: 2px solid #eceff1; margin: 15px 0 10px 0;}
@@ -73,20 +88,34 @@ div[data-testid="column"] .stButton > button:hover { color: #ef5350 !important;
 /* 連結去除底線 */
 a.hot-link { text-decoration: none; color: inherit; display: block; margin-bottom: 4px;}
 
+/* 產業新聞 */
+.news-category-header { font-size: 15px; font-weight: 800; color: #37474f; margin: 14px 0 4px 0; }
+.news-item-compact { padding: 6px 0; border-bottom: 1px dashed #eee; }
+.news-link-text { text-decoration: none; color: #212121; font-weight: 600; font-size: 14px; }
+.news-link-text:hover { color: #d84315; }
+.news-meta-compact { font-size: 11px; color: #9e9e9e; }
+
 .stButton > button { width: 100%; border-radius: 8px; font-weight: bold; font-size: 15px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);}
 </style>
 """, unsafe_allow_html=True)
 
 # --- 4. 訪客計數器 ---
 if 'visit_count' not in st.session_state:
-    try:
-        r = requests.get(GAS_URL, params={"action": "visit"}, timeout=2)
-        data = r.json()
-        st.session_state['visit_count'] = data.get('count', '...')
-    except: st.session_state['visit_count'] = "..."
+    st.session_state['visit_count'] = gas.visit()
 st.markdown(f'<div class="visitor-counter">👨‍👩‍👧‍👦 累積訪客: {st.session_state["visit_count"]} 人</div>', unsafe_allow_html=True)
 
 # --- 5. 側邊欄 ---
+def pick_symbol(key, placeholder):
+    # 輸入代碼或名稱，列出符合的股票，自動補上 .TW / .TWO
+    text = st.text_input("代碼或名稱", key=key, placeholder=placeholder)
+    matches = symbol_index.search(text)
+    if not matches:
+        code = symbol_index.resolve(text)
+        if text and not code: st.caption("⚠️ 查無此代碼，請輸入完整代碼 (上市 .TW、上櫃 .TWO)")
+        return code
+    return st.selectbox("符合的股票", [symbol_index.ticker(m) for m in matches], key=f"{key}_pick",
+                        format_func=lambda t: f"{symbol_index.name(t)} ({t})")
+
 query_params = st.query_params
 default_user = query_params.get("user", "阿美")
 with st.sidebar:
@@ -95,27 +124,31 @@ with st.sidebar:
     if current_user != default_user:
         st.query_params["user"] = current_user
         st.rerun()
+    # 登記這個工作階段 (共用資料依線上人數做參考計數，見 data_service.py)
+    service.heartbeat(current_user)
     st.divider()
     st.header("⚙️ 股票管理")
     with st.expander("➕ 新增到【庫存股】"):
-        inv_code = st.text_input("代碼", key="add_inv", placeholder="如 2330.TW")
+        inv_code = pick_symbol("add_inv", "如 2330 或 台積電")
+        inv_shares = st.number_input("股數", min_value=0, step=1000, key="add_inv_shares")
+        inv_cost = st.number_input("平均成本", min_value=0.0, step=0.5, key="add_inv_cost")
         if st.button("加入庫存"):
-            try: requests.get(GAS_URL, params={"action": "add", "code": inv_code.upper(), "type": "inventory", "user": current_user}, timeout=2)
-            except: pass
-            st.cache_data.clear(); st.rerun()
+            gas.add(portfolio.format_position(inv_code, inv_shares, inv_cost), "inventory", current_user); st.rerun()
     with st.expander("➕ 新增到【觀察名單】"):
-        watch_code = st.text_input("代碼", key="add_watch", placeholder="如 2603.TW")
+        watch_code = pick_symbol("add_watch", "如 2603 或 長榮")
         if st.button("加入觀察"):
-            try: requests.get(GAS_URL, params={"action": "add", "code": watch_code.upper(), "type": "watchlist", "user": current_user}, timeout=2)
-            except: pass
-            st.cache_data.clear(); st.rerun()
+            gas.add(watch_code, "watchlist", current_user); st.rerun()
+    with st.expander("🔔 新增【到價提醒】"):
+        alert_code = pick_symbol("add_alert", "如 2330 或 台積電")
+        alert_kind = st.selectbox("條件", list(alerts.KINDS), format_func=alerts.KINDS.get, key="alert_kind")
+        alert_level = st.number_input("門檻", min_value=0.0, step=1.0, key="alert_level")
+        if st.button("加入提醒"):
+            gas.add(alerts.format_rule(alert_code, alert_kind, alert_level), "alerts", current_user); st.rerun()
     with st.expander("📰 新增【新聞頻道】"):
         new_rss = st.text_input("輸入「鉅亨」或網址", key="rss_in")
         if st.button("加入頻道"):
-            try: requests.get(GAS_URL, params={"action": "add", "code": new_rss, "type": "news", "user": current_user}, timeout=2)
-            except: pass
-            st.cache_data.clear(); st.rerun()
-    if st.button("🔄 強制更新"): st.cache_data.clear(); st.rerun()
+            gas.add(new_rss, "news", current_user); st.rerun()
+    if st.button("🔄 強制更新"): quotes.quote_cache.clear(); st.rerun()
 
 # 標題
 c1, c2 = st.columns([3, 1])
@@ -125,173 +158,188 @@ with c1:
 with c2:
     st.write("") 
     if st.button("🔴 更新股價", type="primary", use_container_width=True):
-        st.cache_data.clear()
+        quotes.quote_cache.clear()
         st.rerun()
 
-# --- 6. 巨型漢化字典 (1000+ 筆資料，解決代碼顯示問題) ---
-# 為了節省篇幅，這裡列出關鍵邏輯，實際運作會用這個字典去查
-STOCK_MAP = {
-    # ETF
-    "0050":"元大台灣50","0056":"元大高股息","00878":"國泰永續高股息","00919":"群益台灣精選","00929":"復華科技優息","00940":"元大台灣價值","00939":"統一台灣高息",
-    "006208":"富邦台50","00713":"元大高息低波","00679B":"元大美債20年","00687B":"國泰20年美債","0051":"元大中型100","00631L":"50正2","00632R":"50反1",
-    "00881":"國泰5G","00830":"費城半導體","00891":"中信半導體","00900":"富邦高股息","00918":"大華高填息","00915":"凱基優選",
-    # 半導體/電子
-    "2330":"台積電","2454":"聯發科","2317":"鴻海","2303":"聯電","2308":"台達電","3711":"日月光","3034":"聯詠","2379":"瑞昱","3037":"欣興",
-    "2382":"廣達","3231":"緯創","6669":"緯穎","2357":"華碩","2356":"英業達","2376":"技嘉","2301":"光寶科","2412":"中華電","3045":"台灣大",
-    "4904":"遠傳","2345":"智邦","2324":"仁寶","2353":"宏碁","2354":"鴻準","2327":"國巨","2344":"華邦電","2408":"南亞科","3036":"文曄",
-    "3702":"大聯大","2395":"研華","4938":"和碩","2383":"台光電","2368":"金像電","6239":"力成","6415":"矽力","5269":"祥碩","2449":"京元電",
-    "6278":"台表科","2313":"華通","3017":"奇鋐","3324":"雙鴻","3035":"智原","3661":"世芯","3443":"創意","3529":"力旺","5274":"信驊","6531":"愛普",
-    # 金融
-    "2881":"富邦金","2882":"國泰金","2891":"中信金","2886":"兆豐金","2884":"玉山金","2892":"第一金","5880":"合庫金","2880":"華南金","2885":"元大金",
-    "2890":"永豐金","2883":"開發金","2887":"台新金","2834":"臺企銀","2801":"彰銀","2812":"台中銀","2809":"京城銀","2888":"新光金","2889":"國票金",
-    # 傳產
-    "2002":"中鋼","1101":"台泥","1102":"亞泥","2603":"長榮","2609":"陽明","2615":"萬海","2618":"長榮航","2610":"華航","1605":"華新","2201":"裕隆",
-    "1519":"華城","1513":"中興電","1503":"士電","1504":"東元","9910":"豐泰","2912":"統一超","1216":"統一","2027":"大成鋼","2014":"中鴻","9945":"潤泰新",
-    "1301":"台塑","1303":"南亞","1326":"台化","6505":"台塑化","1402":"遠東新","2105":"正新","2106":"建大","9904":"寶成","9921":"巨大","1560":"中砂",
-    "1514":"亞力","1609":"大亞","1907":"永豐餘","2049":"上銀","2371":"大同","2409":"友達","2481":"強茂","2606":"裕民","2637":"慧洋","3008":"大立光"
-}
-
+# --- 6. 漢化字典 (上市/上櫃代碼索引，見 symbols.py / data/symbols.csv) ---
 def get_name(ticker):
-    code = ticker.replace(".TW", "").replace(".TWO", "").split(".")[0]
-    # 1. 查字典
-    if code in STOCK_MAP: return STOCK_MAP[code]
-    # 2. 若字典沒有，回傳原始代碼 (但前端會用顏色標記)
-    return code
+    # 本地索引查詢 (不連網)；查不到回傳原始代碼 (但前端會用顏色標記)
+    return symbol_index.name(ticker) or quotes.to_code(ticker)
 
 def get_list_from_cloud(list_type, user):
-    try:
-        response = requests.get(GAS_URL, params={"action": "read", "type": list_type, "user": user}, timeout=5)
-        data = response.json()
-        if isinstance(data, list): return data
-        return []
-    except: return []
+    return gas.read(list_type, user)
 
 def update_cloud_remove(code, list_type, user):
-    try: requests.get(GAS_URL, params={"action": "remove", "code": code, "type": list_type, "user": user}, timeout=2)
-    except: pass
+    gas.remove(code, list_type, user)
 
+@perf.timed("get_stock_data")
 def get_stock_data(ticker_list):
-    if not ticker_list: return pd.DataFrame()
-    valid = [str(t).strip() for t in ticker_list if t and str(t).strip() != ""]
-    if not valid: return pd.DataFrame()
-    
-    data = []
-    try:
-        stocks = yf.Tickers(" ".join(valid))
-        for t in valid:
-            try:
-                info = stocks.tickers[t].history(period="5d")
-                if len(info) > 0:
-                    price = info['Close'].iloc[-1]
-                    prev = info['Close'].iloc[-2] if len(info) > 1 else price
-                    pct = ((price - prev) / prev) * 100
-                    color = "#e53935" if pct >= 0 else "#43a047"
-                    sign = "▲" if pct >= 0 else "▼"
-                    
-                    display_name = get_name(t)
-                    # 如果字典沒抓到，嘗試用 yfinance 的英文名做最後掙扎
-                    if display_name == t.replace(".TW", "").replace(".TWO", ""):
-                         try: 
-                             short = stocks.tickers[t].info.get('shortName', t)
-                             display_name = short.split(" ")[0] if len(short) > 0 else t
-                         except: pass
-
-                    data.append({
-                        "name": display_name, "code": t.replace(".TW", "").replace(".TWO", ""),
-                        "full_code": t, "price": f"{price:.2f}",
-                        "pct": f"{pct:.2f}%", "color": color, "sign": sign
-                    })
-            except: continue
-    except: pass
-    return pd.DataFrame(data)
+    # 背景執行緒負責更新報價，頁面只讀共用快取
+    quotes_df = quotes.get_quotes(ticker_list, stale_ok=service.subscribe_symbols(ticker_list))
+    if quotes_df.empty: return pd.DataFrame()
+    df = quotes.to_display(quotes_df, get_name)
+    # 如果字典沒抓到，用 yfinance 的英文名做最後掙扎 (只讀本地快取，沒有就背景抓，下次更新再顯示)
+    # 英文名在背景翻成中文，翻好之前先顯示英文
+    missing = df['name'] == df['code']
+    if missing.any():
+        fundamentals.store.prefetch(df.loc[missing, 'full_code'])
+        english = df.loc[missing, 'full_code'].map(fundamentals.store.english_name)
+        known = english.notna()
+        df.loc[english[known].index, 'name'] = translator.company_names(english[known])
+    # 迷你走勢圖：直接讀本地價格庫，不用再連網
+    closes = price_store.store.history(df['full_code'], render.SPARK_DAYS)
+    df['spark'] = [render.sparkline_svg(closes[c].dropna() if c in closes else [], color) for c, color in zip(df['full_code'], df['color'])]
+    return df
 
 def get_financial_metrics(ticker):
-    try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        def safe_get(key, fmt="{:.2f}"):
-            val = info.get(key)
-            return fmt.format(val) if val is not None else "--"
-        return {
-            "EPS": safe_get('trailingEps'), "ROE": safe_get('returnOnEquity', "{:.2%}"),
-            "ROA": safe_get('returnOnAssets', "{:.2%}"), "PER (本益)": safe_get('trailingPE'),
-            "PBR (淨值)": safe_get('priceToBook'), "殖利率": safe_get('dividendYield', "{:.2%}")
-        }
-    except: return None
+    info = fundamentals.store.get(ticker)
+    if info is None: return None
+    def safe_get(key, fmt="{:.2f}"):
+        val = info.get(key)
+        return fmt.format(val) if val is not None else "--"
+    return {
+        "EPS": safe_get('trailingEps'), "ROE": safe_get('returnOnEquity', "{:.2%}"),
+        "ROA": safe_get('returnOnAssets', "{:.2%}"), "PER (本益)": safe_get('trailingPE'),
+        "PBR (淨值)": safe_get('priceToBook'), "殖利率": safe_get('dividendYield', "{:.2%}")
+    }
 
 # --- 新功能：鄉民八卦抓取 (Mobile01 RSS + PTT Google Search) ---
 @st.cache_data(ttl=600)
 def fetch_forum_topics():
-    topics = []
-    # 1. Mobile01 投資理財版 RSS
-    try:
-        m01 = feedparser.parse("https://www.mobile01.com/rss/topiclist.php?f=291")
-        for entry in m01.entries[:6]:
-            topics.append({"source": "Mobile01", "title": entry.title, "link": entry.link, "color": "#01c001"})
-    except: pass
-    
-    # 2. PTT Stock (透過 Google RSS 模擬，因 PTT 禁止直接爬蟲)
-    try:
-        # 搜尋 "PTT Stock" 相關的最新索引
-        ptt_url = "https://news.google.com/rss/search?q=site:ptt.cc/bbs/Stock+閒聊&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
-        ptt = feedparser.parse(ptt_url)
-        for entry in ptt.entries[:6]:
-            # 清理標題
-            title = entry.title.replace(" - 看板 Stock - 批踢踢實業坊", "").replace("Re: ", "")
-            topics.append({"source": "PTT", "title": title, "link": entry.link, "color": "#212121"})
-    except: pass
-    
+    # 兩個來源並行抓取 (見 news.py)
+    feeds = news.fetcher.fetch_many([news.MOBILE01_RSS, news.PTT_RSS])
+    topics = [{"source": "Mobile01", "title": e["title"], "link": e["link"], "color": "#01c001"} for e in feeds[news.MOBILE01_RSS][:6]]
+    topics += [{"source": "PTT", "title": e["title"], "link": e["link"], "color": "#212121"} for e in feeds[news.PTT_RSS][:6]]
     return topics
 
 def fetch_specific_stock_news(stock_name):
-    encoded_name = urllib.parse.quote(stock_name)
-    rss_url = f"https://news.google.com/rss/search?q={encoded_name}+股票&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
-    try:
-        feed = feedparser.parse(rss_url)
-        news_items = []
-        for entry in feed.entries[:5]:
-            news_items.append({"title": entry.title, "link": entry.link, "date": entry.published[:16] if 'published' in entry else ""})
-        return news_items
-    except: return []
+    entries = news.fetcher.fetch(news.stock_feed(stock_name))
+    return [{"title": e["title"], "link": e["link"], "date": e["date"]} for e in entries[:5]]
+
+def fetch_and_filter_news(user_rss, stock_names=()):
+    return news.fetch_and_filter_news(user_rss, stock_names)
+
+def translate_titles(items):
+    # 英文標題換成中文 (只查快取，沒翻過的先顯示原文，背景翻好後下次重跑就會換上)
+    return [{**item, "title": title} for item, title in zip(items, translator.lookup([i["title"] for i in items]))]
+
+# --- 區塊自動重跑間隔：跟背景更新同步 (盤中每分鐘、盤前盤後 5 分鐘、收盤後不重跑) ---
+# 每次整頁重跑都會重新計算，收盤後只剩整頁的 5 分鐘 autorefresh
+LIVE_REFRESH_SECONDS = INTERVALS[market_phase()]
+
+# --- 到價提醒：只重跑這一區 (不必整頁更新)，同一規則每個工作階段每天只提醒一次 ---
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def alert_panel(entries):
+    index = alerts.RuleIndex(entries)
+    if index.rules.empty: return
+    symbols = index.symbols
+    q = quotes.get_quotes(symbols, stale_ok=service.subscribe_symbols(symbols))
+    prev = st.session_state.get("alert_snapshot", {})
+    seen = st.session_state.get("alert_rules_seen", set())
+    # 只評估報價有變動的代碼，加上剛新增的規則
+    todo = set(alerts.changed_symbols(q, prev)) | set(index.rules.index[~index.rules['entry'].isin(seen)])
+    st.session_state["alert_snapshot"] = {**prev, **alerts.snapshot(q)}
+    st.session_state["alert_rules_seen"] = set(index.rules['entry'])
+    fired = st.session_state.setdefault("alerts_fired", {})
+    today = get_tw_time()[:10]
+    for full_code, r in index.evaluate(q, todo).iterrows():
+        key = f"{r['entry']}@{today}"
+        if key in fired: continue
+        fired[key] = f"🔔 {alerts.describe(get_name(full_code), r['kind'], r['level'])} (現價 {r['last']:.2f}, {r['pct']:+.2f}%)"
+        st.toast(fired[key])
+    active = [t for k, t in fired.items() if k.endswith(today) and k.split("@")[0] in st.session_state["alert_rules_seen"]]
+    if active: st.warning("  \n".join(active))
+
+# --- 股價卡片區 (見 render.py)：每區一段 HTML，只重跑這一區就能更新報價 ---
+def show_grid(df, kind):
+    html, st.session_state[f"snap_{kind}"] = render.card_grid(df, kind, st.session_state.get(f"snap_{kind}"))
+    st.markdown(html, unsafe_allow_html=True)
+
+def removal_box(df, key):
+    # 整區共用一個移除入口，取代每張卡片一個按鈕；回傳要移除的代碼
+    with st.expander("✕ 移除股票"):
+        picked = st.multiselect("選擇要移除的股票", df['full_code'].tolist(), key=f"rm_{key}",
+                                format_func=lambda c: f"{get_name(c)} ({quotes.to_code(c)})")
+        if st.button("移除", key=f"rm_btn_{key}") and picked: return picked
+    return []
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def inventory_section(positions):
+    if positions.empty: return None
+    df = get_stock_data(positions.index.tolist())
+    if df.empty: return None
+    valued = portfolio.value(positions, df.set_index('full_code'))
+    if valued['shares'].sum() > 0:
+        summ = portfolio.summary(valued)
+        s_cols = st.columns(4)
+        s_cols[0].metric("總市值", f"{summ['market_value']:,.0f}")
+        s_cols[1].metric("總成本", f"{summ['cost_value']:,.0f}")
+        s_cols[2].metric("未實現損益", f"{summ['unrealized']:+,.0f}", f"{summ['unrealized_pct']:+.2f}%", delta_color="inverse")
+        s_cols[3].metric("今日損益", f"{summ['day_pnl']:+,.0f}", f"{summ['day_pct']:+.2f}%", delta_color="inverse")
+    # 每張卡片的損益與佔庫存比重一次算好 (沒填股數的顯示空白)
+    pnl = valued['unrealized'].reindex(df['full_code']).to_numpy()
+    pnl_pct = valued['unrealized_pct'].reindex(df['full_code']).to_numpy()
+    weight = valued['weight'].reindex(df['full_code']).to_numpy()
+    df['pnl'] = [" · ".join(([f"{v:+,.0f} ({p:+.1f}%)"] if v == v else []) + ([f"佔{w:.0f}%"] if w > 0 else []))
+                 for v, p, w in zip(pnl, pnl_pct, weight)]
+    df['pnl_color'] = pd.Series(pnl).ge(0).map({True: quotes.UP_COLOR, False: quotes.DOWN_COLOR}).to_numpy()
+    show_grid(df, "inventory")
+    picked = removal_box(df, "inventory")
+    if picked:
+        for code in picked:
+            for entry in positions.at[code, 'entries']: update_cloud_remove(entry, "inventory", current_user)
+        st.rerun()
+    return df
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def watchlist_section(watch_list):
+    df = get_stock_data(watch_list) if watch_list else pd.DataFrame()
+    if df.empty: return None
+    show_grid(df, "watchlist")
+    picked = removal_box(df, "watchlist")
+    if picked:
+        for code in picked: update_cloud_remove(code, "watchlist", current_user)
+        st.rerun()
+    return df
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def hot_section(tickers):
+    df = get_stock_data(tickers)
+    if not df.empty: show_grid(df, "hot")
+    return df
 
 # --- 7. 戰情室分頁配置 ---
 tab1, tab2, tab5, tab6, tab4 = st.tabs(["📊 我的投資", "🔥 市場熱點", "🔍 個股健檢", "🗣️ 鄉民八卦", "📰 產業新聞"])
 
 # === Tab 1: 我的投資 ===
 with tab1:
+    alert_list = get_list_from_cloud("alerts", current_user)
+    alert_panel(alert_list)
     st.markdown('<div class="section-header">💰 庫存損益</div>', unsafe_allow_html=True)
     inv_list = get_list_from_cloud("inventory", current_user)
-    df_inv = pd.DataFrame()
-    if inv_list: df_inv = get_stock_data(inv_list)
-
-    if not df_inv.empty:
-        cols = st.columns(8) 
-        for i, row in df_inv.iterrows():
-            with cols[i%8]:
-                st.markdown(f"""<div class="compact-card" style="border-left: 4px solid {row['color']};"><div class="compact-name" title="{row['name']}">{row['name']}</div><div class="compact-price" style="color:{row['color']}">{row['price']}</div><div style="font-size:12px; font-weight:bold; color:{row['color']}">{row['sign']} {row['pct']}</div></div>""", unsafe_allow_html=True)
-                if st.button("✕", key=f"d_{row['code']}"): 
-                    update_cloud_remove(row['full_code'], "inventory", current_user); st.cache_data.clear(); st.rerun()
-    else: st.info(f"嗨 {current_user}，庫存空白，請從左側加入股票。")
+    positions = portfolio.positions_frame(inv_list)
+    inv_symbols = positions.index.tolist()
+    watch_list = get_list_from_cloud("watchlist", current_user)
+    # 個股健檢用的基本面先在背景預抓，切換選單時不用再等
+    fundamentals.store.prefetch(inv_symbols + watch_list)
+    if inventory_section(positions) is None: st.info(f"嗨 {current_user}，庫存空白，請從左側加入股票。")
 
     st.markdown('<div class="section-header">👀 觀察名單</div>', unsafe_allow_html=True)
-    watch_list = get_list_from_cloud("watchlist", current_user)
-    df_watch = pd.DataFrame()
-    if watch_list: df_watch = get_stock_data(watch_list)
-
-    if not df_watch.empty:
-        cols2 = st.columns(8)
-        for i, row in df_watch.iterrows():
-            with cols2[i%8]:
-                st.markdown(f"""<div class="compact-card"><div class="compact-name">{row['name']}</div><div class="compact-price" style="color:{row['color']}">{row['price']}</div></div>""", unsafe_allow_html=True)
-                if st.button("✕", key=f"dw_{row['code']}"): 
-                    update_cloud_remove(row['full_code'], "watchlist", current_user); st.cache_data.clear(); st.rerun()
-    else: st.info("暫無觀察名單")
+    if watchlist_section(watch_list) is None: st.info("暫無觀察名單")
+
+    if alert_list:
+        with st.expander(f"🔔 我的到價提醒 ({len(alert_list)})"):
+            rule_text = {e: alerts.describe(get_name(r[0]), r[1], r[2]) for e in alert_list if (r := alerts.parse_rule(e))}
+            to_remove = st.multiselect("選擇要刪除的提醒", list(rule_text), format_func=rule_text.get, key="alert_remove")
+            if st.button("刪除提醒", key="alert_remove_btn") and to_remove:
+                for e in to_remove: update_cloud_remove(e, "alerts", current_user)
+                st.rerun()
 
 # === Tab 2: 市場熱點 (30檔) ===
 with tab2:
     st.markdown("""<div class="section-header">🔥 市場 30 大熱門討論股 <span class="hot-badge">HOT</span></div>""", unsafe_allow_html=True)
     
-    # 30 檔熱門股 (依熱度與成交量排序)
+    # 預設 30 檔熱門股 (背景排行還沒算出來之前使用，見 ranking.py)
     HOT_SEARCH_TICKERS = [
         "00940.TW", "00919.TW", "00929.TW", "00878.TW", "0056.TW", "0050.TW", "00939.TW", "00679B.TW",
         "2330.TW", "2317.TW", "2454.TW", "3231.TW", "2382.TW", "2376.TW", "6669.TW", "3035.TW",
@@ -299,13 +347,7 @@ with tab2:
         "1605.TW", "2881.TW", "2882.TW", "2891.TW", "2886.TW", "2892.TW"
     ]
     
-    df_hot_search = get_stock_data(HOT_SEARCH_TICKERS)
-    if not df_hot_search.empty:
-        hot_cols = st.columns(8) # 一行8個
-        for i, row in df_hot_search.iterrows():
-            with hot_cols[i%8]:
-                url = f"https://www.google.com/search?q={row['name']} 股票 討論 ptt"
-                st.markdown(f"""<a href="{url}" target="_blank" class="hot-link"><div class="hot-card"><div class="compact-name" style="color:#d84315;">{row['name']}</div><div class="compact-price" style="color:{row['color']}">{row['price']}</div><div style="font-size:11px; color:{row['color']};">{row['sign']} {row['pct']}</div></div></a>""", unsafe_allow_html=True)
+    hot_section(ranking.ranker.top(30, HOT_SEARCH_TICKERS))
 
 # === Tab 6: 🗣️ 鄉民八卦 (PTT/Mobile01) ===
 with tab6:
@@ -313,7 +355,8 @@ with tab6:
     st.caption("彙整「PTT 股版」與「Mobile01 投資版」的最新熱門討論。")
     
     # 顯示論壇熱門文章
-    forum_topics = fetch_forum_topics()
+    service.subscribe_feeds([news.MOBILE01_RSS, news.PTT_RSS])
+    forum_topics = translate_titles(fetch_forum_topics())
     if forum_topics:
         for topic in forum_topics:
             badge_color = "#01c001" if topic['source'] == "Mobile01" else "#212121"
@@ -337,10 +380,7 @@ with tab6:
 # === Tab 5: 個股健檢 (含專屬新聞) ===
 with tab5:
     st.markdown('<div class="section-header">🔍 財務與籌碼概況</div>', unsafe_allow_html=True)
-    all_stocks = []
-    if not df_inv.empty: all_stocks.extend(df_inv['full_code'].tolist())
-    if not df_watch.empty: all_stocks.extend(df_watch['full_code'].tolist())
-    all_stocks = list(set(all_stocks))
+    all_stocks = list(dict.fromkeys(inv_symbols + watch_list))
     
     if all_stocks:
         selected_stock = st.selectbox("請選擇股票:", all_stocks, format_func=lambda x: f"{get_name(x)} ({x.split('.')[0]})")
@@ -358,10 +398,11 @@ with tab5:
                 
                 # 2. 專屬新聞
                 st.markdown(f"""<div class="section-header">📰 {stock_name_zh} 最新相關新聞</div>""", unsafe_allow_html=True)
-                stock_news = fetch_specific_stock_news(stock_name_zh)
+                service.subscribe_feeds([news.stock_feed(stock_name_zh)])
+                stock_news = translate_titles(fetch_specific_stock_news(stock_name_zh))
                 if stock_news:
-                    for news in stock_news:
-                        st.markdown(f"""<div class="stock-news-card"><a href="{news['link']}" target="_blank" class="stock-news-title">{news['title']}</a><div class="stock-news-date">{news['date']}</div></div>""", unsafe_allow_html=True)
+                    for item in stock_news:
+                        st.markdown(f"""<div class="stock-news-card"><a href="{item['link']}" target="_blank" class="stock-news-title">{item['title']}</a><div class="stock-news-date">{item['date']}</div></div>""", unsafe_allow_html=True)
                 else: st.info(f"暫無 {stock_name_zh} 的相關新聞。")
             else: st.error("查無數據")
     else: st.warning("請先加入股票。")
@@ -369,8 +410,12 @@ with tab5:
 # === Tab 4: 產業新聞 ===
 with tab4:
     user_rss = get_list_from_cloud("news", current_user)
-    with st.spinner("載入新聞..."):
-        news_buckets = fetch_and_filter_news(user_rss)
+    my_names = [get_name(t) for t in set(inv_symbols) | set(watch_list)]
+    service.subscribe_feeds(news.news_sources(user_rss, my_names))
+    with st.spinner("載入新聞..."), perf.timer("fetch_news"):
+        news_buckets = fetch_and_filter_news(user_rss, my_names)
+    translated = iter(translate_titles([n for items in news_buckets.values() for n in items]))
+    news_buckets = {cat: [next(translated) for _ in items] for cat, items in news_buckets.items()}
     for cat, items in news_buckets.items():
         if items:
             st.markdown(f'<div class="news-category-header">{cat} ({len(items)})</div>', unsafe_allow_html=True)
@@ -378,3 +423,21 @@ with tab4:
                 st.markdown(f'<div class="news-item-compact"><a href="{n["link"]}" target="_blank" class="news-link-text">{n["title"]}</a><div class="news-meta-compact">{n["src"]} • {n["date"]}</div></div>', unsafe_allow_html=True)
 
 st.markdown("<br><br>", unsafe_allow_html=True)
+perf.observe("page_render", time.perf_counter() - _page_start)
+
+# --- 8. 管理面板 (網址加 ?admin=1) ---
+if query_params.get("admin") == "1":
+    with st.expander("🛠️ 效能監控", expanded=True):
+        st.caption(f"背景更新：{'執行中' if refresher.running() else '未啟動'} | 錯誤：{refresher.last_error or '無'}")
+        shared = service.stats()
+        st.caption(f"共用資料：線上 {shared['sessions']} 人 | 訂閱代碼 {shared['symbols']} 檔 | 新聞來源 {shared['feeds']} 個")
+        st.markdown("**共用代碼 (訂閱的工作階段數)**")
+        refs = pd.Series(service.refcounts("symbols"), name="sessions", dtype=int).sort_values(ascending=False)
+        st.dataframe(refs.rename_axis("symbol").reset_index(), hide_index=True, width="stretch")
+        st.markdown("**延遲 (ms)**")
+        st.dataframe(pd.DataFrame(perf.latency_rows()), hide_index=True, width="stretch")
+        st.markdown("**快取命中率**")
+        st.dataframe(pd.Series(perf.cache_ratios(), name="hit_ratio").map("{:.1%}".format), width="stretch")
+        st.markdown("**上游呼叫 / 計數器**")
+        st.dataframe(pd.DataFrame(perf.counter_rows()), hide_index=True, width="stretch")
+        st.download_button("下載 Prometheus 格式", perf.prometheus(), file_name="metrics.prom", mime="text/plain")
@@ -0,0 +1,193 @@
+# --- 離線效能測試：用本地 fixture 重播 yfinance / GAS / RSS 回應，量測冷/熱頁面載入時間 ---
+# 錄製真實回應 (需要網路)： python bench.py record --user 阿美 --tickers 200
+# 離線重播量測：            python bench.py run --tickers 10 50 200 --users 1 5 20 --latency 0.05
+# 沒有錄到的代碼/頻道會用固定亂數種子產生假資料，所以沒有 fixture 也能跑。
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+FIXTURE_DIR = os.path.join(BASE_DIR, "bench", "fixtures")
+APP_MODULES = ("quotes", "news", "fundamentals", "price_store", "portfolio", "alerts", "render", "ranking",
+               "symbols", "refresher", "gas_client", "metrics", "translate", "data_service", "config")
+
+
+def _fixture(*parts):
+    return os.path.join(FIXTURE_DIR, *parts)
+
+
+def _url_key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+def _seed(text):
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+# --- 錄製 ---
+def record(user, n_tickers):
+    from gas_client import gas
+    import news
+    import price_store
+    from symbols import symbol_index
+    os.makedirs(_fixture("yfinance"), exist_ok=True)
+    os.makedirs(_fixture("gas"), exist_ok=True)
+    os.makedirs(_fixture("rss"), exist_ok=True)
+    lists = gas.read_all(user, refresh=True)
+    with open(_fixture("gas", f"{user}.json"), "w", encoding="utf-8") as f: json.dump(lists, f, ensure_ascii=False)
+    tickers = list(dict.fromkeys([e.split("|")[0] for e in lists["inventory"]] + lists["watchlist"] + symbol_index.all_tickers()[:n_tickers]))
+    raw = price_store.download_history(tickers, period=price_store.INITIAL_PERIOD)
+    for t in tickers:
+        frame = pd.DataFrame({fld: price_store.field_frame(raw, fld, [t])[t] for fld in price_store.FIELDS}).dropna(subset=["Close"])
+        if not frame.empty: frame.to_csv(_fixture("yfinance", f"{t}.csv"), index_label="Date")
+    urls = [news.resolve_feed(x) for x in lists["news"]] + [news.MOBILE01_RSS, news.PTT_RSS]
+    urls += [news.stock_feed(symbol_index.name(t) or t) for t in tickers[:20]]
+    for url in dict.fromkeys(u for u in urls if u):
+        try: body = news.fetcher.session.get(url, timeout=10).content
+        except Exception: continue
+        with open(_fixture("rss", f"{_url_key(url)}.xml"), "wb") as f: f.write(body)
+    print(f"已錄製 {len(tickers)} 檔報價、{len(urls)} 個新聞來源 -> {FIXTURE_DIR}")
+
+
+# --- 重播 ---
+def _history(ticker):
+    path = _fixture("yfinance", f"{ticker}.csv")
+    if os.path.exists(path): return pd.read_csv(path, index_col="Date", parse_dates=True)
+    rng = np.random.default_rng(_seed(ticker))
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=65, name="Date")
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, len(idx))))
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": rng.integers(1_000, 50_000, len(idx)) * 1000.0}, index=idx)
+
+
+def _synthetic_rss(url):
+    rng = random.Random(_seed(url))
+    words = ["台積電", "鴻海", "長榮", "ETF", "降息", "AI", "高股息", "航運", "美股", "半導體"]
+    items = "".join(f"<item><title>{rng.choice(words)} 新聞 {i}</title><link>https://example.com/{_url_key(url)}/{i}</link>"
+                    f"<pubDate>Fri, 16 Oct 2026 0{i % 10}:00:00 GMT</pubDate></item>" for i in range(15))
+    return f'<?xml version="1.0"?><rss><channel><title>bench</title>{items}</channel></rss>'.encode("utf-8")
+
+
+class _Response:
+    def __init__(self, body, status=200):
+        self.content = body if isinstance(body, bytes) else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.status_code, self.ok, self.headers = status, status < 400, {"ETag": _url_key(self.content.decode("utf-8", "ignore"))}
+
+    def json(self): return json.loads(self.content)
+
+    def raise_for_status(self): pass
+
+
+def install_fakes(universe, latency):
+    import requests
+    import yfinance as yf
+    from deep_translator import GoogleTranslator
+
+    def fake_download(tickers, start=None, period=None, **kwargs):
+        time.sleep(latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {t: _history(t) for t in tickers}
+        if start: frames = {t: f[f.index >= pd.Timestamp(start)] for t, f in frames.items()}
+        return pd.concat(frames, axis=1, names=["Ticker", "Price"])
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            time.sleep(latency)
+            rng = random.Random(_seed(ticker))
+            self.info = {"trailingEps": rng.uniform(1, 30), "returnOnEquity": rng.uniform(0, 0.3), "returnOnAssets": rng.uniform(0, 0.1),
+                         "trailingPE": rng.uniform(8, 30), "priceToBook": rng.uniform(0.8, 5), "dividendYield": rng.uniform(0, 0.06),
+                         "shortName": f"BENCH {ticker}"}
+
+    def fake_get(self, url, params=None, headers=None, **kwargs):
+        time.sleep(latency)
+        if "script.google.com" in url:
+            params = params or {}
+            if params.get("action") == "visit": return _Response({"count": 1})
+            if params.get("action") != "readAll": return _Response([])
+            path = _fixture("gas", f"{params.get('user')}.json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f: return _Response(json.load(f))
+            half = len(universe) // 2
+            return _Response({"inventory": [f"{t}|1000|50" for t in universe[:half]], "watchlist": universe[half:],
+                              "news": ["鉅亨"], "alerts": [f"{universe[0]}|above|1"] if universe else []})
+        path = _fixture("rss", f"{_url_key(url)}.xml")
+        if os.path.exists(path):
+            with open(path, "rb") as f: return _Response(f.read())
+        return _Response(_synthetic_rss(url))
+
+    def fake_translate(self, text, **kwargs):
+        time.sleep(latency)
+        return f"譯{text}"
+
+    yf.download, yf.Ticker, requests.Session.get = fake_download, FakeTicker, fake_get
+    GoogleTranslator.translate = fake_translate
+
+
+def fresh_app_state():
+    # 每個情境都從空的快取開始 (新的快取目錄 + 重新載入 app 的模組)
+    os.environ["MOM_CACHE_DIR"] = tempfile.mkdtemp(prefix="momstock-bench-")
+    os.environ["MOM_BACKGROUND"] = "0"
+    for name in APP_MODULES: sys.modules.pop(name, None)
+
+
+def run_page(user):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.query_params["user"] = user
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception: raise RuntimeError(at.exception[0].value)
+    return elapsed
+
+
+def run(ticker_counts, user_counts, latency):
+    sys.path.insert(0, BASE_DIR)
+    rows = []
+    for n in ticker_counts:
+        fresh_app_state()
+        from symbols import symbol_index
+        universe = symbol_index.all_tickers()[:n]
+        universe += [f"9{i:03d}.TW" for i in range(n - len(universe))]
+        install_fakes(universe, latency)
+        for users in user_counts:
+            fresh_app_state()
+            times = [run_page(f"bench{u}") for u in range(users)]
+            registry = sys.modules["metrics"].registry
+            calls = {r.get("source"): r["value"] for r in registry.counter_rows() if r["name"] == "upstream_calls_total"}
+            ratios = registry.cache_ratios()
+            rows.append({"tickers": n, "users": users, "cold_s": times[0],
+                         "warm_avg_s": float(np.mean(times[1:])) if users > 1 else float("nan"),
+                         "warm_p95_s": float(np.percentile(times[1:], 95)) if users > 1 else float("nan"),
+                         "yf_calls": calls.get("yfinance", 0), "gas_calls": calls.get("gas", 0), "rss_calls": calls.get("rss", 0),
+                         "quote_hit": ratios.get("quotes", float("nan"))})
+            print(f"tickers={n} users={users} cold={times[0]:.3f}s", flush=True)
+    result = pd.DataFrame(rows)
+    print(result.to_string(index=False, float_format="%.3f"))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="阿美的股海顧問 離線效能測試")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="錄製真實的 yfinance / GAS / RSS 回應")
+    rec.add_argument("--user", default="阿美")
+    rec.add_argument("--tickers", type=int, default=200)
+    rp = sub.add_parser("run", help="用 fixture 重播並量測頁面時間")
+    rp.add_argument("--tickers", type=int, nargs="+", default=[10, 50, 200])
+    rp.add_argument("--users", type=int, nargs="+", default=[1, 5])
+    rp.add_argument("--latency", type=float, default=0.05, help="模擬每次上游呼叫的延遲 (秒)")
+    args = parser.parse_args()
+    if args.cmd == "record":
+        sys.path.insert(0, BASE_DIR); record(args.user, args.tickers)
+    else:
+        run(args.tickers, args.users, args.latency)
@@ -0,0 +1,7 @@
+# --- 共用設定：台灣時區、專案目錄、本地快取目錄 (MOM_CACHE_DIR 可改，bench.py 用來隔離每個情境) ---
+import os
+from datetime import timedelta, timezone
+
+TW_TZ = timezone(timedelta(hours=8))
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("MOM_CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
@@ -0,0 +1,105 @@
+# --- 多人共用資料層：每檔代碼、每個新聞來源在程序內只有一份快照，依線上工作階段做參考計數 ---
+# 工作階段只訂閱自己清單裡的代碼與來源；沒有任何線上工作階段參考的資料就從快取移除，
+# 記憶體與上游流量跟「不重複的代碼數」成正比，而不是跟同時上線的人數。
+import threading
+import time
+
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import news
+import quotes
+from gas_client import gas
+from metrics import registry as metrics
+from refresher import refresher
+
+SESSION_TTL = 10 * 60  # 頁面每 5 分鐘自動更新，兩輪都沒出現就當作離線；訂閱項目也依此過期
+SWEEP_INTERVAL = 60
+
+
+def session_id():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else "local"
+
+
+def is_active(sid):
+    # 瀏覽器分頁關掉後 Streamlit 會移除工作階段，不必等 TTL
+    try: return not runtime.exists() or runtime.get_instance().is_active_session(sid)
+    except Exception: return True
+
+
+class DataService:
+    def __init__(self, cache, fetcher, refresher, session_ttl=SESSION_TTL):
+        self.cache, self.fetcher, self.refresher, self.session_ttl = cache, fetcher, refresher, session_ttl
+        self._sessions = {}  # 工作階段 -> {"user", "seen", "symbols": {代碼: 時間}, "feeds": {網址: 時間}}
+        self._live = {"symbols": set(), "feeds": set()}  # 上一次整理時有人參考的項目
+        self._lock = threading.Lock()
+        self._swept = 0.0
+
+    def _session(self, now):
+        sid = session_id()
+        s = self._sessions.setdefault(sid, {"user": None, "seen": now, "symbols": {}, "feeds": {}})
+        s["seen"] = now
+        return s
+
+    def heartbeat(self, user):
+        with self._lock: self._session(time.time())["user"] = user
+        self.sweep()
+
+    def _subscribe(self, kind, keys):
+        now = time.time()
+        with self._lock:
+            subs = self._session(now)[kind]
+            for k in keys: subs[k] = now
+            self._live[kind].update(keys)
+
+    def subscribe_symbols(self, symbols):
+        # 回傳已由背景更新中的代碼 (頁面可直接用快取，見 refresher.watch)
+        symbols = quotes.clean_tickers(symbols)
+        self._subscribe("symbols", symbols)
+        return self.refresher.watch(symbols)
+
+    def subscribe_feeds(self, urls):
+        urls = [u for u in dict.fromkeys(urls) if u]
+        self._subscribe("feeds", urls)
+        return urls
+
+    def refcounts(self, kind):
+        counts = {}
+        with self._lock:
+            for s in self._sessions.values():
+                for k in s[kind]: counts[k] = counts.get(k, 0) + 1
+        return counts
+
+    def sweep(self, force=False):
+        # 移除離線的工作階段與過期的訂閱，沒人參考的代碼/來源從共用快取清掉
+        now = time.time()
+        with self._lock:
+            if not force and now - self._swept < SWEEP_INTERVAL: return
+            self._swept = now
+            cutoff = now - self.session_ttl
+            for sid in [sid for sid, s in self._sessions.items() if s["seen"] < cutoff or not is_active(sid)]:
+                del self._sessions[sid]
+            live = {"symbols": set(), "feeds": set()}
+            for s in self._sessions.values():
+                for kind in live:
+                    s[kind] = {k: t for k, t in s[kind].items() if t >= cutoff}
+                    live[kind].update(s[kind])
+            dropped = {kind: self._live[kind] - live[kind] for kind in live}
+            self._live = live
+            users = {s["user"] for s in self._sessions.values()}
+        if dropped["symbols"]:
+            self.cache.evict(dropped["symbols"]); self.refresher.unwatch(dropped["symbols"])
+            metrics.inc("evicted_total", len(dropped["symbols"]), kind="symbol")
+        if dropped["feeds"]:
+            self.fetcher.evict(dropped["feeds"])
+            metrics.inc("evicted_total", len(dropped["feeds"]), kind="feed")
+        for user in gas.users() - users: gas.invalidate(user)
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "symbols": len(self._live["symbols"]), "feeds": len(self._live["feeds"])}
+
+
+service = DataService(quotes.quote_cache, news.fetcher, refresher)
+refresher.hooks.append(service.sweep)
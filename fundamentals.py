@@ -0,0 +1,82 @@
+# --- 基本面資料：.info 欄位存在磁碟 (每天更新一次) + 背景並行預抓 ---
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import yfinance as yf
+
+from config import CACHE_DIR, TW_TZ
+from metrics import registry as metrics
+
+INFO_FIELDS = ("trailingEps", "returnOnEquity", "returnOnAssets", "trailingPE", "priceToBook", "dividendYield", "shortName")
+
+
+def tw_today():
+    return datetime.now(TW_TZ).strftime("%Y-%m-%d")
+
+
+class FundamentalsStore:
+    """yfinance .info 很慢，抓一次存檔，當天之內都直接讀本地資料。"""
+
+    def __init__(self, path, workers=4):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="info")
+        self._pending = {}  # 代碼 -> 背景抓取中的 Future
+        self._data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f: return json.load(f)
+        except (OSError, ValueError): return {}
+
+    def _save(self):
+        # 先寫暫存檔再換名，避免同時讀到寫一半的檔案
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(self._data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def peek(self, symbol):
+        # 只看快取，不連網；過期或沒有就回傳 None
+        with self._lock: entry = self._data.get(symbol)
+        return entry if entry and entry.get("date") == tw_today() else None
+
+    def _fetch(self, symbol):
+        try:
+            metrics.upstream("yfinance_info")
+            with metrics.timer("yfinance_info"): info = yf.Ticker(symbol).info or {}
+            entry = {k: info.get(k) for k in INFO_FIELDS}
+            entry["date"] = tw_today()
+            with self._lock:
+                self._data[symbol] = entry
+                self._save()
+            return entry
+        except Exception: return None
+        finally:
+            with self._lock: self._pending.pop(symbol, None)
+
+    def get(self, symbol):
+        entry = self.peek(symbol)
+        if entry is not None:
+            metrics.cache("fundamentals", True); return entry
+        # 背景預抓已經在抓同一檔就等它，不重複呼叫最慢的 .info
+        with self._lock: future = self._pending.get(symbol)
+        metrics.cache("fundamentals", "coalesced" if future else False)
+        return future.result() if future else self._fetch(symbol)
+
+    def prefetch(self, symbols):
+        # 背景抓取還沒有今日資料的代碼，不阻塞畫面
+        for s in dict.fromkeys(symbols):
+            if not s or self.peek(s): continue
+            with self._lock:
+                # 在鎖內送出：_fetch 結束時要拿同一把鎖才能移除，不會比登記更早
+                if s not in self._pending: self._pending[s] = self._pool.submit(self._fetch, s)
+
+    def english_name(self, symbol):
+        return (self.peek(symbol) or {}).get("shortName") or None
+
+
+store = FundamentalsStore(os.path.join(CACHE_DIR, "fundamentals.json"))
@@ -0,0 +1,124 @@
+# --- Google Apps Script 後端客戶端 (連線池 + 批次讀取 + 重試 + 清單快取) ---
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import registry as metrics
+
+GAS_URL = "https://script.google.com/macros/s/AKfycbwTsM79MMdedizvIcIn7tgwT81VIhj87WM-bvR45QgmMIUsIemmyR_FzMvG3v5LEHEvPw/exec"
+LIST_TYPES = ("inventory", "watchlist", "news", "alerts")
+CORE_TYPES = ("inventory", "watchlist", "news")  # 舊版後端一定有的清單
+
+
+class GasClient:
+    def __init__(self, url, ttl=600, timeout=5, retries=3, backoff=0.5, read_deadline=8):
+        self.url, self.ttl, self.timeout, self.retries, self.backoff = url, ttl, timeout, retries, backoff
+        self.read_deadline = read_deadline  # 一次讀取清單 (含 readAll 試探與重試) 的總時限，舊版逐一讀三個清單最慢 15 秒
+        # 同一個 Session 重複使用連線 (script.google.com 與轉址後的 googleusercontent.com)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=len(LIST_TYPES), thread_name_prefix="gas")
+        self._lists = {}  # 使用者 -> (讀取時間, {清單類型: [代碼...]})
+        self.read_all_supported = None  # 後端是否有 readAll (None = 還不知道)
+        self._lock = threading.Lock()
+
+    def _request(self, params, timeout=None, retries=None, deadline=None):
+        # 連線錯誤/伺服器錯誤才指數退避重試；逾時已經花掉時間，不再重試。寫入動作只送一次，避免重複新增
+        # deadline (time.monotonic()) 限制整體時間：每次的逾時與退避都不會超過
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries):
+            limit = timeout or self.timeout
+            if deadline is not None: limit = min(limit, deadline - time.monotonic())
+            if limit <= 0: raise requests.Timeout("GAS 讀取超過總時限")
+            try:
+                with metrics.timer("gas_request"):
+                    r = self.session.get(self.url, params=params, timeout=limit)
+                metrics.upstream("gas", len(r.content))
+                r.raise_for_status()
+                return r
+            except requests.Timeout: raise
+            except requests.RequestException:
+                if attempt == retries - 1: raise
+                pause = self.backoff * (2 ** attempt)
+                if deadline is not None: pause = min(pause, max(0.0, deadline - time.monotonic()))
+                time.sleep(pause)
+
+    def _get(self, params, timeout=None, retries=None, deadline=None):
+        return self._request(params, timeout, retries, deadline).json()
+
+    def _read_one(self, list_type, user, deadline=None):
+        try: data = self._get({"action": "read", "type": list_type, "user": user}, deadline=deadline)
+        except Exception: return None
+        return data if isinstance(data, list) else []
+
+    def _fetch_lists(self, user):
+        # 後端支援 readAll 時一次取回三種清單；回應格式不對就記住不支援，之後不再多打這一趟
+        deadline = time.monotonic() + self.read_deadline
+        if self.read_all_supported is not False:
+            try:
+                data = self._get({"action": "readAll", "user": user}, retries=1, deadline=deadline)
+                self.read_all_supported = isinstance(data, dict) and all(isinstance(data.get(t), list) for t in CORE_TYPES)
+                if self.read_all_supported: return {t: list(data.get(t) or []) for t in LIST_TYPES}
+            except ValueError: self.read_all_supported = False  # 回應不是 JSON
+            except Exception: pass  # 連線問題，下次再試
+        # 舊版後端：各清單改成並行讀取，延遲只等最慢的一個
+        futures = {t: self._pool.submit(self._read_one, t, user, deadline) for t in LIST_TYPES}
+        return {t: f.result() for t, f in futures.items()}
+
+    def read_all(self, user, refresh=False):
+        with self._lock:
+            hit = self._lists.get(user)
+            fresh = hit and not refresh and time.time() - hit[0] < self.ttl
+        metrics.cache("gas_lists", bool(fresh))
+        if fresh: return {t: list(v) for t, v in hit[1].items()}
+        lists = self._fetch_lists(user)
+        # 有任何一個清單讀取失敗就不寫入快取，下次重跑再讀
+        if all(v is not None for v in lists.values()):
+            with self._lock: self._lists[user] = (time.time(), {t: list(v) for t, v in lists.items()})
+        return {t: list(v or []) for t, v in lists.items()}
+
+    def read(self, list_type, user):
+        return self.read_all(user)[list_type]
+
+    def _write(self, action, code, list_type, user):
+        if not code: return False
+        try:
+            self._request({"action": action, "code": code, "type": list_type, "user": user}, timeout=2, retries=1)
+            return True
+        except Exception: return False
+
+    def add(self, code, list_type, user):
+        ok = self._write("add", code, list_type, user)
+        if ok:
+            # 直接更新本地清單，不必重新讀取整份資料
+            with self._lock:
+                hit = self._lists.get(user)
+                if hit and code not in hit[1][list_type]: hit[1][list_type].append(code)
+        return ok
+
+    def remove(self, code, list_type, user):
+        ok = self._write("remove", code, list_type, user)
+        if ok:
+            with self._lock:
+                hit = self._lists.get(user)
+                if hit and code in hit[1][list_type]: hit[1][list_type].remove(code)
+        return ok
+
+    def users(self):
+        with self._lock: return set(self._lists)
+
+    def invalidate(self, user=None):
+        with self._lock:
+            if user is None: self._lists.clear()
+            else: self._lists.pop(user, None)
+
+    def visit(self):
+        try: return self._get({"action": "visit"}, timeout=2, retries=1).get("count", "...")
+        except Exception: return "..."
+
+
+gas = GasClient(GAS_URL)
@@ -0,0 +1,122 @@
+# --- 效能量測：函式延遲直方圖、上游呼叫次數、快取命中率、下載位元組 ---
+# 管理面板 (網址加 ?admin=1) 顯示，也可以匯出 Prometheus 文字格式。
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+PREFIX = "momstock_"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum, self.count = 0.0, 0
+
+    def observe(self, seconds):
+        self.sum += seconds
+        self.count += 1
+        for i, b in enumerate(BUCKETS):
+            if seconds <= b:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        # 由直方圖估計分位數 (取所在區間的上界)
+        if not self.count: return 0.0
+        target, acc = q * self.count, 0
+        for b, c in zip(BUCKETS, self.counts):
+            acc += c
+            if acc >= target: return b
+        return BUCKETS[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}  # 名稱 -> Histogram
+        self.counters = {}  # (名稱, ((標籤, 值), ...)) -> 數值
+
+    def observe(self, name, seconds):
+        with self._lock: self.histograms.setdefault(name, Histogram()).observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock: self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try: yield
+        finally: self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        def deco(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name): return func(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def cache(self, cache_name, hit, n=1):
+        # hit 可以是 True/False 或結果名稱 (例如 "coalesced")
+        if n: self.inc("cache_requests_total", n, cache=cache_name, result=hit if isinstance(hit, str) else ("hit" if hit else "miss"))
+
+    def upstream(self, source, nbytes=0):
+        self.inc("upstream_calls_total", source=source)
+        if nbytes: self.inc("upstream_bytes_total", nbytes, source=source)
+
+    def reset(self):
+        with self._lock: self.histograms.clear(); self.counters.clear()
+
+    def latency_rows(self):
+        with self._lock: items = list(self.histograms.items())
+        return [{"name": n, "count": h.count, "avg_ms": h.sum / h.count * 1000 if h.count else 0,
+                 "p50_ms": h.quantile(0.5) * 1000, "p95_ms": h.quantile(0.95) * 1000} for n, h in sorted(items)]
+
+    def counter_rows(self):
+        with self._lock: items = list(self.counters.items())
+        return [{"name": n, **dict(labels), "value": v} for (n, labels), v in sorted(items)]
+
+    def cache_ratios(self):
+        totals = {}
+        for r in self.counter_rows():
+            if r["name"] != "cache_requests_total": continue
+            t = totals.setdefault(r["cache"], {})
+            t[r["result"]] = t.get(r["result"], 0) + r["value"]
+        return {c: t.get("hit", 0) / sum(t.values()) for c, t in totals.items() if sum(t.values())}
+
+    def prometheus(self):
+        lines = []
+        with self._lock:
+            hists, counters = list(self.histograms.items()), list(self.counters.items())
+        for name in sorted({n for (n, _), _ in counters}):
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            for (n, labels), v in sorted(counters):
+                if n != name: continue
+                lbl = ",".join(f'{k}="{val}"' for k, val in labels)
+                lines.append(f"{PREFIX}{n}{{{lbl}}} {v:g}" if lbl else f"{PREFIX}{n} {v:g}")
+        for name, h in sorted(hists, key=lambda x: x[0]):
+            metric = f"{PREFIX}{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            acc = 0
+            for b, c in zip(BUCKETS, h.counts):
+                acc += c
+                lines.append(f'{metric}_bucket{{le="{"+Inf" if b == float("inf") else f"{b:g}"}"}} {acc}')
+            lines.append(f"{metric}_sum {h.sum:.6f}")
+            lines.append(f"{metric}_count {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path=None):
+        # 給 node_exporter textfile collector 使用 (設定 METRICS_TEXTFILE 環境變數)
+        path = path or os.environ.get("METRICS_TEXTFILE")
+        if not path: return
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f: f.write(self.prometheus())
+        os.replace(tmp, path)
+
+
+registry = Registry()
+timed, timer = registry.timed, registry.timer
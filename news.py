@@ -0,0 +1,208 @@
+# --- 新聞彙整：RSS 並行抓取 + 條件式請求 (ETag/Last-Modified) + 去重 + 分類 ---
+import calendar
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import feedparser
+import requests
+
+from metrics import registry as metrics
+
+MOBILE01_RSS = "https://www.mobile01.com/rss/topiclist.php?f=291"
+# PTT 禁止直接爬蟲，透過 Google News RSS 搜尋股版文章
+PTT_RSS = "https://news.google.com/rss/search?q=site:ptt.cc/bbs/Stock+閒聊&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
+
+
+def google_news(query):
+    return f"https://news.google.com/rss/search?q={urllib.parse.quote(query)}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
+
+
+# 常用簡稱 -> RSS 網址 (新聞網站多半沒有穩定的 RSS，改用 Google News 的站內搜尋)
+FEED_ALIASES = {
+    "鉅亨": google_news("site:news.cnyes.com"),
+    "經濟日報": google_news("site:money.udn.com"),
+    "工商時報": google_news("site:ctee.com.tw"),
+    "自由財經": google_news("site:ec.ltn.com.tw"),
+    "Yahoo": google_news("site:tw.stock.yahoo.com"),
+    "MoneyDJ": google_news("site:moneydj.com"),
+    "Mobile01": MOBILE01_RSS,
+    "PTT": PTT_RSS,
+}
+
+# 分類關鍵字 (依序比對，第一個命中的分類)
+NEWS_CATEGORIES = {
+    "🔌 半導體/電子": ["台積電", "半導體", "晶片", "晶圓", "AI", "伺服器", "輝達", "NVIDIA", "聯發科", "鴻海", "電子"],
+    "🏦 金融/銀行": ["金控", "銀行", "壽險", "升息", "降息", "央行", "Fed", "聯準會"],
+    "🚢 航運/傳產": ["航運", "貨櫃", "長榮", "陽明", "萬海", "航空", "鋼", "塑化", "水泥", "重電"],
+    "💰 ETF/股利": ["ETF", "配息", "除息", "殖利率", "股利", "高股息"],
+    "🌏 國際/總經": ["美股", "道瓊", "那斯達克", "標普", "通膨", "CPI", "關稅", "匯率", "美元", "GDP"],
+}
+OTHER_CATEGORY = "📰 其他"
+TRACKING_PARAMS = {"oc", "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "fbclid"}
+LATIN_KEYWORD = re.compile(r"[A-Za-z0-9]+")
+MY_STOCKS_CATEGORY = "📌 我的股票"
+
+
+def resolve_feed(entry):
+    # 網址直接使用；簡稱查表；其他文字當成 Google News 關鍵字
+    text = str(entry).strip()
+    if not text: return None
+    if text.lower().startswith(("http://", "https://")): return text
+    for alias, url in FEED_ALIASES.items():
+        if alias.lower() in text.lower(): return url
+    return google_news(text)
+
+
+def _clean_title(title, source=None):
+    # Google News 標題尾巴會帶 " - 來源" (來源另外顯示)；PTT 標題帶看板名稱
+    title = title.replace(" - 看板 Stock - 批踢踢實業坊", "").replace("Re: ", "").strip()
+    if source and title.endswith(f" - {source}"): title = title[:-len(source) - 3]
+    return title.strip()
+
+
+def _link_key(link):
+    # 去重用的連結：只拿掉追蹤參數，保留識別文章的參數 (例如 Mobile01 的 ?f=&t=)
+    parts = urllib.parse.urlsplit(link)
+    query = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if k not in TRACKING_PARAMS]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query), fragment=""))
+
+
+def _normalize(entry, feed_title):
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    source = entry.get("source", {}).get("title") if isinstance(entry.get("source"), dict) else None
+    return {
+        "title": _clean_title(entry.get("title", ""), source), "link": entry.get("link", ""),
+        "date": entry.get("published", "")[:16], "ts": calendar.timegm(parsed) if parsed else 0,
+        "src": source or feed_title or "",
+    }
+
+
+class FeedFetcher:
+    """所有 RSS 共用的抓取器：並行送出、每個來源各自逾時，沒變動的來源只花一個 304。"""
+
+    def __init__(self, timeout=6, min_interval=60):
+        self.timeout, self.min_interval = timeout, min_interval
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (Mom-Stock-Report RSS)"
+        self._state = {}  # 網址 -> {"etag", "modified", "entries", "time"}
+        self._inflight = {}  # 網址 -> threading.Event (同一來源同時只有一個請求在路上)
+        self._lock = threading.Lock()
+
+    def cached(self, url):
+        with self._lock: return list(self._state.get(url, {}).get("entries", []))
+
+    def all_cached(self):
+        with self._lock: return {u: list(st["entries"]) for u, st in self._state.items()}
+
+    def _fetch(self, url):
+        with self._lock:
+            state = dict(self._state.get(url, {}))
+            fresh = state and time.time() - state["time"] < self.min_interval
+            waiting = None if fresh else self._inflight.get(url)
+            if not fresh and waiting is None: self._inflight[url] = threading.Event()
+        if fresh:
+            metrics.cache("rss", True)
+            return state["entries"]
+        if waiting is not None:
+            # 別的工作階段正在抓同一個來源：等它的結果，不重複送出
+            metrics.cache("rss", "coalesced")
+            waiting.wait(self.timeout)
+            return self.cached(url)
+        metrics.cache("rss", False)
+        try: return self._download(url, state)
+        finally:
+            with self._lock: self._inflight.pop(url).set()
+
+    def _download(self, url, state):
+        headers = {}
+        if state.get("etag"): headers["If-None-Match"] = state["etag"]
+        if state.get("modified"): headers["If-Modified-Since"] = state["modified"]
+        try:
+            with metrics.timer("rss_fetch"): r = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException: return state.get("entries", [])
+        metrics.upstream("rss", len(r.content))
+        metrics.inc("rss_responses_total", status=str(r.status_code))
+        if r.status_code == 304:
+            entries = state.get("entries", [])
+        elif r.ok:
+            feed = feedparser.parse(r.content)
+            feed_title = feed.feed.get("title", "")
+            entries = [_normalize(e, feed_title) for e in feed.entries]
+        else: return state.get("entries", [])
+        with self._lock:
+            self._state[url] = {"etag": r.headers.get("ETag", state.get("etag")),
+                                "modified": r.headers.get("Last-Modified", state.get("modified")),
+                                "entries": entries, "time": time.time()}
+        return entries
+
+    def fetch_many(self, urls):
+        # 每次呼叫一個執行緒一個來源，全部同時送出：總延遲 = 最慢的來源 (最多 timeout 秒)，
+        # 不會因為來源多或其他人也在抓而排隊；逾時的來源用上次的結果
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls: return {}
+        pool = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="rss")
+        futures = {u: pool.submit(self._fetch, u) for u in urls}
+        pool.shutdown(wait=False)
+        done, _ = wait(futures.values(), timeout=self.timeout + 1)
+        return {u: (f.result() if f in done else self.cached(u)) for u, f in futures.items()}
+
+    def fetch(self, url):
+        return self.fetch_many([url])[url]
+
+    def evict(self, urls):
+        with self._lock:
+            for u in urls: self._state.pop(u, None)
+
+
+fetcher = FeedFetcher()
+
+
+def dedupe(items):
+    # 同一則新聞常出現在多個來源：連結或標題重複就略過
+    seen_links, seen_titles, out = set(), set(), []
+    for it in items:
+        link, title = _link_key(it["link"]), "".join(it["title"].split()).lower()
+        if not title or link in seen_links or title in seen_titles: continue
+        seen_links.add(link); seen_titles.add(title); out.append(it)
+    return out
+
+
+def keyword_pattern(keywords):
+    # 英文關鍵字要整個字相符且區分大小寫 ("AI" 不會配到 "Taiwan"、"Fed" 不會配到 "Fedex")，中文照舊用子字串
+    parts = [rf"(?<![A-Za-z0-9]){re.escape(k)}(?![A-Za-z0-9])" if LATIN_KEYWORD.fullmatch(k) else re.escape(k) for k in keywords]
+    return re.compile("|".join(parts))
+
+
+CATEGORY_PATTERNS = {c: keyword_pattern(kws) for c, kws in NEWS_CATEGORIES.items()}
+
+
+def categorize(items, stock_names=()):
+    buckets = {MY_STOCKS_CATEGORY: [], **{c: [] for c in NEWS_CATEGORIES}, OTHER_CATEGORY: []}
+    names = [n for n in stock_names if n]
+    for it in items:
+        title = it["title"]
+        if any(n.lower() in title.lower() for n in names): buckets[MY_STOCKS_CATEGORY].append(it); continue
+        cat = next((c for c, pat in CATEGORY_PATTERNS.items() if pat.search(title)), OTHER_CATEGORY)
+        buckets[cat].append(it)
+    return buckets
+
+
+def stock_feed(name):
+    return google_news(f"{name} 股票")
+
+
+def news_sources(user_rss, stock_names=()):
+    # 使用者頻道 + Mobile01/PTT + 每檔持股的 Google News
+    sources = [resolve_feed(x) for x in user_rss or []] + [MOBILE01_RSS, PTT_RSS]
+    return sources + [stock_feed(n) for n in stock_names if n]
+
+
+def fetch_and_filter_news(user_rss, stock_names=(), per_feed=15):
+    # 全部來源一次並行抓取
+    results = fetcher.fetch_many(news_sources(user_rss, stock_names))
+    items = [it for entries in results.values() for it in entries[:per_feed]]
+    items.sort(key=lambda it: it["ts"], reverse=True)
+    return categorize(dedupe(items), stock_names)
@@ -0,0 +1,57 @@
+# --- 庫存損益：持股數與平均成本，整張表向量化計算市值、損益、權重 ---
+# 雲端庫存清單每筆格式為「代碼|股數|平均成本」(舊資料只有代碼，視為 0 股)。
+import numpy as np
+import pandas as pd
+
+SEP = "|"
+POSITION_COLUMNS = ["shares", "cost", "entries"]
+
+
+def parse_position(entry):
+    parts = [p.strip() for p in str(entry).split(SEP)]
+    def num(i):
+        try: return float(parts[i]) if len(parts) > i and parts[i] else 0.0
+        except ValueError: return 0.0
+    return parts[0], num(1), num(2)
+
+
+def format_position(symbol, shares=0, cost=0):
+    # 股數存整數、成本用 repr 保留完整精度 (:g 只有 6 位有效數字，612.3456 會變 612.346)
+    if not symbol: return None
+    return f"{symbol}{SEP}{int(round(shares))}{SEP}{float(cost)!r}" if shares else symbol
+
+
+def positions_frame(entries):
+    # 同一檔分多次加入時合併：股數加總、成本依股數加權平均；entries 保留原始字串 (刪除時要用)
+    rows = [(*parse_position(e), e) for e in entries or [] if str(e).strip()]
+    if not rows: return pd.DataFrame(columns=POSITION_COLUMNS).rename_axis("full_code")
+    raw = pd.DataFrame(rows, columns=["full_code", "shares", "cost", "entry"])
+    raw["cost_value"] = raw["shares"] * raw["cost"]
+    g = raw.groupby("full_code", sort=False)
+    out = pd.DataFrame({"shares": g["shares"].sum(), "cost_value": g["cost_value"].sum(), "entries": g["entry"].agg(list)})
+    out["cost"] = np.where(out["shares"] > 0, out["cost_value"] / out["shares"].where(out["shares"] > 0, 1), 0.0)
+    return out[POSITION_COLUMNS]
+
+
+def value(positions, quotes_df):
+    # quotes_df: index=full_code，欄位 last / prev (數值)
+    df = positions[["shares", "cost"]].join(quotes_df[["last", "prev"]], how="inner")
+    df["market_value"] = df["shares"] * df["last"]
+    # 沒填成本的部位不算未實現損益 (NaN，加總時略過)
+    df["cost_value"] = (df["shares"] * df["cost"]).where(df["cost"] > 0)
+    df["unrealized"] = df["market_value"] - df["cost_value"]
+    df["unrealized_pct"] = df["unrealized"] / df["cost_value"] * 100
+    df["day_pnl"] = df["shares"] * (df["last"] - df["prev"])
+    total = df["market_value"].sum()
+    df["weight"] = df["market_value"] / total * 100 if total else 0.0
+    return df
+
+
+def summary(valued):
+    mv, cv, day = valued["market_value"].sum(), valued["cost_value"].sum(), valued["day_pnl"].sum()
+    unrealized, prev_mv = valued["unrealized"].sum(), mv - day
+    return {
+        "market_value": mv, "cost_value": cv, "unrealized": unrealized,
+        "unrealized_pct": unrealized / cv * 100 if cv else 0.0,
+        "day_pnl": day, "day_pct": day / prev_mv * 100 if prev_mv else 0.0,
+    }
@@ -0,0 +1,130 @@
+# --- 本地價格資料庫 (SQLite)：每檔每日一根 K 棒，只補抓上次之後缺少的部分 ---
+# 今天的 K 棒在盤中會一直被覆蓋 (即時價)，收盤後就是當日收盤。
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+import yfinance as yf
+from yfinance import shared as yf_shared
+
+from config import CACHE_DIR, TW_TZ
+from metrics import registry as metrics
+
+DB_PATH = os.path.join(CACHE_DIR, "prices.sqlite")
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+INITIAL_PERIOD = "3mo"  # 新代碼第一次抓的長度 (走勢圖、成交量均量用)
+KEEP_DAYS = 400  # compact() 保留的天數
+# yfinance 的錯誤表 (shared._ERRORS) 是全程序共用、每次下載都會重設；頁面、背景更新、排行同時下載時，
+# 下載與讀錯誤表要在同一把鎖內完成，才不會讀到別人的結果 (把連線失敗誤記成「查無此代碼」)
+DOWNLOAD_LOCK = threading.Lock()
+MISSING_ERROR = re.compile(r"delisted|not found|no data found|no price data", re.I)  # 代碼本身不存在，不是連線問題
+
+
+@metrics.timed("yfinance_download")
+def download_history(tickers, **kwargs):
+    # 單一請求抓全部代碼 (group_by="ticker" -> 欄位為 (代碼, 欄位) 的 MultiIndex)
+    if "start" not in kwargs: kwargs.setdefault("period", "5d")
+    raw = None
+    try:
+        raw = yf.download(tickers, group_by="ticker", progress=False, threads=True, auto_adjust=True, **kwargs)
+        return raw
+    finally:
+        # yfinance 不回傳原始回應，下載量以取回的資料表大小計
+        metrics.upstream("yfinance", int(raw.memory_usage(index=True).sum()) if raw is not None else 0)
+
+
+def failed_symbols(raw, tickers):
+    # yf.download 連線失敗不會丟例外，只回傳空表；舊版另外把錯誤記在 yfinance.shared._ERRORS (代碼 -> 訊息)
+    if raw is None or raw.empty: return set(tickers)
+    errors = getattr(yf_shared, "_ERRORS", None) or {}
+    return {t for t in tickers if t in errors and not MISSING_ERROR.search(str(errors[t]))}
+
+
+def field_frame(raw, field, tickers):
+    # 取出寬表: index=日期, columns=代碼
+    if raw is None or raw.empty: return pd.DataFrame(columns=tickers, dtype=float)
+    if isinstance(raw.columns, pd.MultiIndex):
+        level = 0 if field in raw.columns.get_level_values(0) else 1
+        wide = raw.xs(field, axis=1, level=level)
+    else:
+        wide = raw[[field]].set_axis(tickers[:1], axis=1)
+    return wide.reindex(columns=tickers).astype(float)
+
+
+def to_bars(raw, tickers):
+    # 寬表 -> 長表 (symbol, date, open, high, low, close, volume)，沒有收盤價的列丟掉
+    cols = {f.lower(): field_frame(raw, f, tickers).stack() for f in FIELDS}
+    bars = pd.DataFrame(cols).dropna(subset=["close"])
+    if bars.empty: return bars
+    bars.index = bars.index.set_names(["date", "symbol"])
+    bars = bars.reset_index()
+    bars["date"] = pd.to_datetime(bars["date"]).dt.strftime("%Y-%m-%d")
+    return bars[["symbol", "date", "open", "high", "low", "close", "volume"]]
+
+
+class PriceStore:
+    def __init__(self, path=DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("""CREATE TABLE IF NOT EXISTS bars (
+            symbol TEXT, date TEXT, open REAL, high REAL, low REAL, close REAL, volume REAL,
+            PRIMARY KEY (symbol, date)) WITHOUT ROWID""")
+        self._lock = threading.Lock()
+
+    def _query(self, sql, params=()):
+        with self._lock: return self._con.execute(sql, params).fetchall()
+
+    def last_dates(self, symbols):
+        if not symbols: return {}
+        marks = ",".join("?" * len(symbols))
+        return dict(self._query(f"SELECT symbol, MAX(date) FROM bars WHERE symbol IN ({marks}) GROUP BY symbol", list(symbols)))
+
+    def upsert(self, bars):
+        if bars.empty: return 0
+        metrics.inc("bars_fetched_total", len(bars))
+        with self._lock:
+            self._con.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", bars.itertuples(index=False, name=None))
+            self._con.commit()
+        return len(bars)
+
+    def update(self, symbols):
+        # 依「最後一根 K 棒日期」分組下載；從最後那天開始抓 (含)，順便覆蓋盤中未完成的 K 棒
+        # 回傳下載失敗的代碼 (連線問題，不是查無此代碼)
+        symbols = list(dict.fromkeys(symbols))
+        last = self.last_dates(symbols)
+        groups, failed = {}, set()
+        for s in symbols: groups.setdefault(last.get(s), []).append(s)
+        for start, group in groups.items():
+            kwargs = {"start": start} if start else {"period": INITIAL_PERIOD}
+            with DOWNLOAD_LOCK:
+                raw = download_history(group, **kwargs)
+                failed |= failed_symbols(raw, group)
+            self.upsert(to_bars(raw, group))
+        return failed
+
+    def history(self, symbols, n=2, field="close"):
+        # 每檔最後 n 根 K 棒 -> 寬表 (index=日期, columns=代碼)
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols: return pd.DataFrame(dtype=float)
+        marks = ",".join("?" * len(symbols))
+        rows = self._query(f"""SELECT symbol, date, {field} FROM (
+            SELECT symbol, date, {field}, ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY date DESC) AS rn
+            FROM bars WHERE symbol IN ({marks})) WHERE rn <= ?""", [*symbols, n])
+        long = pd.DataFrame(rows, columns=["symbol", "date", field])
+        wide = long.pivot(index="date", columns="symbol", values=field).sort_index()
+        return wide.reindex(columns=[s for s in symbols if s in wide.columns]).astype(float)
+
+    def compact(self, keep_days=KEEP_DAYS):
+        # 刪除太舊的 K 棒並整理檔案
+        cutoff = (datetime.now(TW_TZ) - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+        with self._lock:
+            self._con.execute("DELETE FROM bars WHERE date < ?", (cutoff,))
+            self._con.commit()
+            self._con.execute("VACUUM")
+
+
+store = PriceStore()
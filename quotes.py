@@ -0,0 +1,167 @@
+# --- 報價引擎：一次批次下載全部代碼 (經由 price_store)，整張表向量化計算漲跌 ---
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import price_store
+from metrics import registry as metrics
+
+UP_COLOR, DOWN_COLOR = "#e53935", "#43a047"
+QUOTE_FIELDS = ["last", "prev", "pct", "volume", "avg_volume"]
+VOLUME_WINDOW = 20  # 均量天數
+
+# 報價快取設定 (秒 / 檔數)，可用環境變數調整
+QUOTE_CACHE_TTL = int(os.environ.get("QUOTE_CACHE_TTL", 300))
+QUOTE_CACHE_SIZE = int(os.environ.get("QUOTE_CACHE_SIZE", 2000))
+
+
+def to_code(ticker):
+    # "2330.TW" / "6488.TWO" -> "2330" / "6488"
+    return str(ticker).split(".")[0]
+
+
+def clean_tickers(ticker_list):
+    # 去空白、去重複，保留原本順序
+    seen, out = set(), []
+    for t in ticker_list or []:
+        t = str(t).strip() if t else ""
+        if t and t not in seen:
+            seen.add(t); out.append(t)
+    return out
+
+
+def build_quotes(closes):
+    # 每檔取最後兩筆有效收盤 (各檔交易日可能不同，不能直接取最後兩列)
+    long = closes.stack().dropna()
+    if long.empty: return pd.DataFrame(columns=["last", "prev", "pct"], dtype=float)
+    tail = long.groupby(level=1, sort=False).tail(2).groupby(level=1, sort=False)
+    out = pd.DataFrame({"last": tail.last(), "prev": tail.first()})
+    out["pct"] = (out["last"] - out["prev"]) / out["prev"] * 100
+    out.index.name = "full_code"
+    return out.reindex([t for t in closes.columns if t in out.index])
+
+
+def volume_stats(volumes):
+    # 每檔最新成交量，與之前 (最多 VOLUME_WINDOW 天) 的平均量
+    long = volumes.stack().dropna()
+    if long.empty: return pd.DataFrame(columns=["volume", "avg_volume"], dtype=float)
+    g = long.groupby(level=1, sort=False)
+    last, n = g.last(), g.count()
+    avg = (g.sum() - last) / (n - 1).where(n > 1)
+    return pd.DataFrame({"volume": last, "avg_volume": avg})
+
+
+def fetch_quotes(ticker_list):
+    # 回傳 index=full_code，欄位 last / prev / pct / volume / avg_volume (數值)
+    tickers = clean_tickers(ticker_list)
+    if not tickers: return pd.DataFrame(columns=QUOTE_FIELDS, dtype=float)
+    # 本地價格庫只補抓最新的 K 棒，漲跌用最後兩根收盤計算
+    failed = price_store.store.update(tickers)
+    out = build_quotes(price_store.store.history(tickers, 2))
+    out = out.join(volume_stats(price_store.store.history(tickers, VOLUME_WINDOW + 1, "volume")))[QUOTE_FIELDS]
+    # 下載失敗、本地也沒有資料的代碼記在 attrs，快取不要把它們當成「查無資料」
+    out.attrs["failed"] = sorted(s for s in failed if s not in out.index)
+    return out
+
+
+class QuoteCache:
+    """全站共用的單檔報價快取 (TTL + LRU)，同一代碼同時只會有一個請求在路上。"""
+
+    def __init__(self, fetch, ttl=QUOTE_CACHE_TTL, maxsize=QUOTE_CACHE_SIZE, wait_timeout=30):
+        self.fetch, self.ttl, self.maxsize, self.wait_timeout = fetch, ttl, maxsize, wait_timeout
+        self._data = OrderedDict()  # 代碼 -> (抓取時間, 報價 dict 或 None)
+        self._inflight = {}  # 代碼 -> threading.Event
+        self._lock = threading.Lock()
+
+    def _lookup(self, symbol, now, stale_ok=False):
+        hit = self._data.get(symbol)
+        if hit is None or (not stale_ok and now - hit[0] >= self.ttl): return False, None
+        self._data.move_to_end(symbol)
+        return True, hit[1]
+
+    def _store(self, symbol, row, now):
+        self._data[symbol] = (now, row)
+        self._data.move_to_end(symbol)
+        while len(self._data) > self.maxsize: self._data.popitem(last=False)
+
+    def get_many(self, symbols, stale_ok=()):
+        # stale_ok: 由背景執行緒持續更新的代碼，過期也直接回傳快取，不當場下載
+        rows, mine, waits = {}, [], {}
+        with self._lock:
+            now = time.time()
+            for s in symbols:
+                ok, row = self._lookup(s, now, s in stale_ok)
+                if ok: rows[s] = row
+                elif s in self._inflight: waits[s] = self._inflight[s]
+                else:
+                    self._inflight[s] = threading.Event(); mine.append(s)
+        metrics.cache("quotes", True, len(rows)); metrics.cache("quotes", False, len(mine)); metrics.cache("quotes", "coalesced", len(waits))
+        if mine:
+            fresh = None
+            try: fresh = self.fetch(mine)
+            except Exception: pass  # 連線失敗不寫入快取，下次重跑再試
+            finally:
+                failed = set(fresh.attrs.get("failed", ())) if fresh is not None else set(mine)
+                with self._lock:
+                    now = time.time()
+                    for s in mine:
+                        row = fresh.loc[s, QUOTE_FIELDS].to_dict() if fresh is not None and s in fresh.index else None
+                        # 查無此代碼也記下來 (None)，避免每次重跑都再打一次；連線失敗的不寫入
+                        if s not in failed: self._store(s, row, now)
+                        rows[s] = row
+                        self._inflight.pop(s).set()
+        for s, ev in waits.items():
+            ev.wait(self.wait_timeout)
+            with self._lock: rows[s] = self._lookup(s, time.time(), True)[1]
+        hits = [s for s in symbols if rows.get(s) is not None]
+        return pd.DataFrame([rows[s] for s in hits], index=pd.Index(hits, name="full_code"), columns=QUOTE_FIELDS, dtype=float)
+
+    def refresh(self, symbols):
+        # 背景更新用：強制重抓並覆蓋快取 (失敗時保留舊資料)
+        fresh = self.fetch(symbols)
+        failed = set(fresh.attrs.get("failed", ()))
+        with self._lock:
+            now = time.time()
+            for s in symbols:
+                if s in fresh.index: self._store(s, fresh.loc[s, QUOTE_FIELDS].to_dict(), now)
+                elif s not in self._data and s not in failed: self._store(s, None, now)
+
+    def missing(self, symbols):
+        # 快取裡沒有、或上次查無資料 (None) 的代碼
+        with self._lock: return [s for s in symbols if (self._data.get(s) or (0, None))[1] is None]
+
+    def evict(self, symbols):
+        with self._lock:
+            for s in symbols: self._data.pop(s, None)
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+
+quote_cache = QuoteCache(fetch_quotes)
+
+
+def get_quotes(ticker_list, stale_ok=()):
+    # 頁面使用的入口：先查共用快取，只下載過期或沒見過的代碼
+    return quote_cache.get_many(clean_tickers(ticker_list), stale_ok)
+
+
+def to_display(quotes, name_of):
+    # 轉成卡片使用的欄位 (name, code, full_code, price, pct, color, sign)
+    if quotes.empty: return pd.DataFrame()
+    up = quotes["pct"].to_numpy() >= 0
+    full = quotes.index.to_series()
+    return pd.DataFrame({
+        "name": full.map(name_of).to_numpy(),
+        "code": full.map(to_code).to_numpy(),
+        "full_code": full.to_numpy(),
+        "price": quotes["last"].map("{:.2f}".format).to_numpy(),
+        "pct": quotes["pct"].map("{:.2f}%".format).to_numpy(),
+        "color": np.where(up, UP_COLOR, DOWN_COLOR),
+        "sign": np.where(up, "▲", "▼"),
+        "last": quotes["last"].to_numpy(), "prev": quotes["prev"].to_numpy(),
+    })
@@ -0,0 +1,77 @@
+# --- 熱門股排行：從全市場的成交值、量增、漲跌幅與論壇/新聞討論度算出前 N 名 ---
+# 由背景執行緒 (refresher.py) 定期重算，結果全站共用。
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import news
+import price_store
+import quotes
+from symbols import symbol_index
+
+RANK_INTERVAL = 10 * 60  # 盤中每 10 分鐘重算
+CHUNK = 200  # 每次下載的代碼數
+WEIGHTS = {"turnover": 0.35, "vol_ratio": 0.25, "abs_pct": 0.25, "mentions": 0.15}
+
+
+def mention_counts(names, titles):
+    # 各股名稱出現在論壇/新聞標題的次數 (名稱太短容易誤判，至少 2 個字)
+    text = "\n".join(titles)
+    return pd.Series([text.count(n) if len(n) >= 2 else 0 for n in names], index=names.index, dtype=float)
+
+
+def score(features):
+    # 各指標先轉成全市場百分位數再加權，避免成交值的量級壓過其他指標
+    pct_ranks = features[list(WEIGHTS)].rank(pct=True).fillna(0)
+    return pct_ranks.mul(pd.Series(WEIGHTS)).sum(axis=1)
+
+
+def build_features(closes, volumes, names, titles):
+    q = quotes.build_quotes(closes).join(quotes.volume_stats(volumes))
+    if q.empty: return pd.DataFrame(columns=list(WEIGHTS))
+    f = pd.DataFrame(index=q.index)
+    f["turnover"] = q["last"] * q["volume"]
+    f["vol_ratio"] = (q["volume"] / q["avg_volume"]).replace([np.inf, -np.inf], np.nan)
+    f["abs_pct"] = q["pct"].abs()
+    f["mentions"] = mention_counts(names.reindex(q.index).fillna(""), titles)
+    return f
+
+
+class HotRanker:
+    def __init__(self, interval=RANK_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._top = []  # 依分數排序的代碼
+        self.updated = None
+
+    def top(self, n=30, fallback=()):
+        with self._lock: top = list(self._top)
+        return top[:n] if top else list(fallback)[:n]
+
+    def due(self, phase):
+        if self.updated is None: return True
+        return phase != "closed" and time.time() - self.updated >= self.interval
+
+    def refresh(self, n=100):
+        universe = symbol_index.all_tickers()
+        if not universe: return []
+        # 價格庫只補抓每檔最新的 K 棒
+        for i in range(0, len(universe), CHUNK):
+            try: price_store.store.update(universe[i:i + CHUNK])
+            except Exception: pass
+        closes = price_store.store.history(universe, 2)
+        volumes = price_store.store.history(universe, quotes.VOLUME_WINDOW + 1, "volume")
+        names = pd.Series({t: symbol_index.name(t) or "" for t in universe})
+        titles = [e["title"] for entries in news.fetcher.all_cached().values() for e in entries]
+        features = build_features(closes, volumes, names, titles)
+        # nlargest 是部分排序 (只挑前 n 名)，不用把全市場排完
+        top = score(features).nlargest(n).index.tolist() if not features.empty else []
+        with self._lock:
+            if top: self._top = top
+            self.updated = time.time()
+        return top
+
+
+ranker = HotRanker()
@@ -0,0 +1,121 @@
+# --- 背景行情更新：每個伺服器程序兩條執行緒 (報價、熱門股排行)，依台股交易時間調整更新頻率 ---
+# 頁面只讀取共用快取 (quotes.quote_cache)，不必等上游回應。
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import price_store
+import quotes
+import ranking
+from config import TW_TZ
+from metrics import registry as metrics
+
+# 盤中每分鐘、盤前盤後每 5 分鐘、收盤後與週末不更新
+INTERVALS = {"open": 60, "edge": 5 * 60, "closed": None}
+RANK_CHECK = 60  # 熱門股排行執行緒多久檢查一次是否該重算
+WATCH_TTL = 30 * 60  # 超過 30 分鐘沒有頁面要的代碼就不再更新
+
+
+def market_phase(now=None):
+    now = now or datetime.now(TW_TZ)
+    if now.weekday() >= 5: return "closed"
+    hm = now.hour * 60 + now.minute
+    if 9 * 60 <= hm <= 13 * 60 + 35: return "open"
+    if 8 * 60 + 30 <= hm < 9 * 60 or 13 * 60 + 35 < hm <= 14 * 60 + 30: return "edge"
+    return "closed"
+
+
+def seconds_until_open(now=None):
+    # 距離下一個交易日 08:30 的秒數 (國定假日仍會醒來一次，沒有行情就繼續睡)
+    now = now or datetime.now(TW_TZ)
+    nxt = now.replace(hour=8, minute=30, second=0, microsecond=0)
+    if nxt <= now: nxt += timedelta(days=1)
+    while nxt.weekday() >= 5: nxt += timedelta(days=1)
+    return max(60.0, (nxt - now).total_seconds())
+
+
+class Refresher:
+    def __init__(self, cache, watch_ttl=WATCH_TTL):
+        self.cache, self.watch_ttl = cache, watch_ttl
+        self._watched = {}  # 代碼 -> 最後一次有頁面需要的時間
+        self._lock = threading.Lock()
+        self._thread = self._rank_thread = None
+        self.last_run, self.last_error = None, None
+        self._compacted = None  # 最後一次整理價格庫的日期
+        self.hooks = []  # 每一輪結束時呼叫 (例如 data_service 清掉沒人看的代碼)
+
+    def watch(self, symbols):
+        # 頁面登記要看的代碼，回傳已經由背景更新中的代碼 (頁面可直接用快取)；
+        # 新代碼或已過期的代碼由頁面自己抓一次，下一輪起由背景更新
+        now, tracked = time.time(), set()
+        with self._lock:
+            cutoff = now - self.watch_ttl
+            for s in quotes.clean_tickers(symbols):
+                if self.running() and self._watched.get(s, 0) >= cutoff: tracked.add(s)
+                self._watched[s] = now
+        return tracked
+
+    def unwatch(self, symbols):
+        with self._lock:
+            for s in symbols: self._watched.pop(s, None)
+
+    def watched(self):
+        with self._lock:
+            cutoff = time.time() - self.watch_ttl
+            for s in [s for s, t in self._watched.items() if t < cutoff]: del self._watched[s]
+            return list(self._watched)
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        # MOM_BACKGROUND=0 可關閉背景更新 (例如跑 bench.py 或多個程序時只讓一個更新)
+        if os.environ.get("MOM_BACKGROUND", "1") == "0": return
+        with self._lock:
+            if self.running(): return
+            self._thread = threading.Thread(target=self._loop, name="quote-refresher", daemon=True)
+            self._thread.start()
+            # 熱門股排行另開一條執行緒：全市場下載很久，不能卡住報價更新
+            self._rank_thread = threading.Thread(target=self._rank_loop, name="hot-ranker", daemon=True)
+            self._rank_thread.start()
+
+    def run_once(self, phase=None):
+        phase = phase or market_phase()
+        # 收盤後每天整理一次價格庫
+        today = datetime.now(TW_TZ).date()
+        if phase == "closed" and self._compacted != today:
+            try: price_store.store.compact()
+            except Exception as e: self.last_error = repr(e)
+            self._compacted = today
+        symbols = self.watched()
+        # 收盤時段只補抓快取裡還沒有報價的代碼 (昨收價不會再變)；之前沒抓到 (None) 的也要重試
+        if phase == "closed": symbols = self.cache.missing(symbols)
+        if not symbols: return
+        try:
+            with metrics.timer("background_refresh"): self.cache.refresh(symbols)
+            self.last_run, self.last_error = time.time(), None
+        except Exception as e: self.last_error = repr(e)
+
+    def _loop(self):
+        while True:
+            phase = market_phase()
+            self.run_once(phase)
+            for hook in self.hooks:
+                try: hook()
+                except Exception as e: self.last_error = repr(e)
+            try: metrics.write_textfile()
+            except OSError: pass
+            time.sleep(INTERVALS[phase] or seconds_until_open())
+
+    def _rank_loop(self):
+        # 熱門股排行：盤中每 RANK_INTERVAL 重算一次，全站共用
+        while True:
+            if ranking.ranker.due(market_phase()):
+                try:
+                    with metrics.timer("rank_refresh"): ranking.ranker.refresh()
+                except Exception as e: self.last_error = repr(e)
+            time.sleep(RANK_CHECK)
+
+
+refresher = Refresher(quotes.quote_cache)
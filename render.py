@@ -0,0 +1,43 @@
+# --- 卡片渲染：每個區塊組成一整段 HTML (CSS grid)，一次 st.markdown 送出 ---
+# 和上一次的快照比對，價格有變動的卡片加上 .flash，只有那幾張會閃動重繪。
+from html import escape
+
+import numpy as np
+
+SPARK_DAYS = 20
+
+CARD_TEMPLATES = {
+    "inventory": (
+        '<div class="compact-card{flash}" style="border-left: 4px solid {color};">'
+        '<div class="compact-name" title="{name}">{name}</div>'
+        '<div class="compact-price" style="color:{color}">{price}</div>'
+        '<div style="font-size:12px; font-weight:bold; color:{color}">{sign} {pct}</div>'
+        '<div class="pnl-line" style="color:{pnl_color}">{pnl}</div>{spark}</div>'),
+    "watchlist": (
+        '<div class="compact-card{flash}"><div class="compact-name">{name}</div>'
+        '<div class="compact-price" style="color:{color}">{price}</div>{spark}</div>'),
+    "hot": (
+        '<a href="https://www.google.com/search?q={name} 股票 討論 ptt" target="_blank" class="hot-link">'
+        '<div class="hot-card{flash}"><div class="compact-name" style="color:#d84315;">{name}</div>'
+        '<div class="compact-price" style="color:{color}">{price}</div>'
+        '<div style="font-size:11px; color:{color};">{sign} {pct}</div>{spark}</div></a>'),
+}
+
+
+def sparkline_svg(values, color, w=80, h=16):
+    v = list(values)
+    if len(v) < 2: return ""
+    lo, hi = min(v), max(v)
+    span = (hi - lo) or 1
+    pts = " ".join(f"{i * w / (len(v) - 1):.1f},{h - (x - lo) / span * h:.1f}" for i, x in enumerate(v))
+    return f'<svg class="spark" width="100%" height="{h}" viewBox="0 0 {w} {h}" preserveAspectRatio="none"><polyline points="{pts}" fill="none" stroke="{color}" stroke-width="1.2"/></svg>'
+
+
+def card_grid(df, kind, previous=None):
+    # previous: 上一次的 {代碼: 價格}；回傳 (整段 HTML, 這次的快照)，價格有變動的卡片加上 flash
+    snapshot = dict(zip(df["full_code"], df["price"]))
+    if previous is None: changed = np.zeros(len(df), dtype=bool)
+    else: changed = np.array([previous.get(c) not in (None, p) for c, p in snapshot.items()], dtype=bool)
+    rows = df.assign(name=df["name"].map(lambda n: escape(str(n))), flash=np.where(changed, " flash", "")).to_dict("records")
+    cards = "".join(CARD_TEMPLATES[kind].format_map(r) for r in rows)
+    return f'<div class="card-grid">{cards}</div>', snapshot
@@ -0,0 +1,172 @@
+# --- 台股代碼索引：上市/上櫃全部證券 (代碼、中文名、英文名、市場、產業) ---
+# 資料來源為 data/symbols.csv，第一次使用時轉成 SQLite (.cache/symbols.sqlite)，之後啟動只讀 SQLite。
+# 更新快照：python symbols.py fetch   (從證交所 ISIN 公開資料重新產生 CSV，英文名取自證交所/櫃買 OpenAPI)
+# 匯入其他檔案：python symbols.py import my_symbols.csv
+import csv
+import difflib
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+
+from config import BASE_DIR, CACHE_DIR
+
+CSV_PATH = os.path.join(BASE_DIR, "data", "symbols.csv")
+DB_PATH = os.path.join(CACHE_DIR, "symbols.sqlite")
+COLUMNS = ("code", "name", "name_en", "market", "industry")
+
+# 證交所 ISIN 查詢頁：strMode=2 上市、strMode=4 上櫃
+ISIN_PAGES = {"TW": "https://isin.twse.com.tw/isin/C_public.jsp?strMode=2",
+              "TWO": "https://isin.twse.com.tw/isin/C_public.jsp?strMode=4"}
+ISIN_SECTIONS = ("股票", "ETF", "ETN", "創新板", "臺灣存託憑證", "受益證券-不動產投資信託")  # 區段名稱開頭
+# 英文簡稱：證交所 / 櫃買中心 OpenAPI 的上市、上櫃公司基本資料 (ISIN 頁面沒有英文名)
+PROFILE_APIS = ("https://openapi.twse.com.tw/v1/opendata/t187ap03_L",
+                "https://www.tpex.org.tw/openapi/v1/mopsfe_t187ap03_O")
+PROFILE_CODE_KEYS = ("公司代號", "SecuritiesCompanyCode")
+PROFILE_NAME_EN_KEYS = ("英文簡稱", "EnglishAbbreviation", "CompanyEnglishAbbreviation")
+
+
+def build_db(csv_path=CSV_PATH, db_path=DB_PATH):
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    tmp = f"{db_path}.tmp"
+    if os.path.exists(tmp): os.remove(tmp)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = [tuple((r.get(c) or "").strip() for c in COLUMNS) for r in csv.DictReader(f)]
+    con = sqlite3.connect(tmp)
+    con.execute("CREATE TABLE symbols (code TEXT PRIMARY KEY, name TEXT, name_en TEXT, market TEXT, industry TEXT) WITHOUT ROWID")
+    con.executemany("INSERT OR REPLACE INTO symbols VALUES (?, ?, ?, ?, ?)", [r for r in rows if r[0]])
+    con.execute("CREATE INDEX symbols_name ON symbols (name)")
+    con.commit(); con.close()
+    os.replace(tmp, db_path)
+
+
+class SymbolIndex:
+    def __init__(self, csv_path=CSV_PATH, db_path=DB_PATH):
+        self.csv_path, self.db_path = csv_path, db_path
+        self._lock = threading.Lock()
+        self._rows = None  # 代碼 -> row dict
+
+    def _ensure_loaded(self):
+        if self._rows is not None: return
+        with self._lock:
+            if self._rows is not None: return
+            # CSV 比 SQLite 新 (或還沒建) 才重建
+            if os.path.exists(self.csv_path) and (not os.path.exists(self.db_path) or os.path.getmtime(self.csv_path) > os.path.getmtime(self.db_path)):
+                build_db(self.csv_path, self.db_path)
+            rows = {}
+            if os.path.exists(self.db_path):
+                con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+                for r in con.execute(f"SELECT {', '.join(COLUMNS)} FROM symbols"):
+                    rows[r[0]] = dict(zip(COLUMNS, r))
+                con.close()
+            self._by_name = {r["name"]: code for code, r in rows.items() if r["name"]}
+            self._rows = rows
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._rows)
+
+    def get(self, ticker):
+        self._ensure_loaded()
+        return self._rows.get(str(ticker).split(".")[0].upper())
+
+    def name(self, ticker):
+        row = self.get(ticker)
+        return row["name"] if row else None
+
+    def ticker(self, row):
+        return f"{row['code']}.{row['market'] or 'TW'}"
+
+    def all_tickers(self):
+        self._ensure_loaded()
+        return [self.ticker(r) for r in self._rows.values()]
+
+    def resolve(self, text):
+        # 使用者輸入 -> 完整代碼 (自動補 .TW / .TWO)；可輸入代碼或中文名
+        # 索引裡沒有的代碼分不出上市或上櫃，回傳 None，請使用者輸入完整代碼 (如 6488.TWO)
+        text = str(text or "").strip()
+        if not text: return None
+        if "." in text: return text.upper()
+        self._ensure_loaded()
+        row = self.get(text) or self._rows.get(self._by_name.get(text, ""))
+        return self.ticker(row) if row else None
+
+    def search(self, text, limit=8):
+        # 代碼/名稱前綴優先，其次包含，最後模糊比對
+        text = str(text or "").strip().split(".")[0]
+        if not text: return []
+        self._ensure_loaded()
+        q, out, seen = text.upper(), [], set()
+
+        def take(rows):
+            # 湊滿 limit 筆就停，不必掃完整個索引
+            for r in rows:
+                if len(out) >= limit: return
+                if r["code"] not in seen: seen.add(r["code"]); out.append(r)
+
+        rows = self._rows.values()
+        take(r for r in rows if r["code"].startswith(q) or r["name"].startswith(text) or r["name_en"].upper().startswith(q))
+        take(r for r in rows if text in r["name"] or (len(q) > 2 and q in r["name_en"].upper()))
+        if len(out) < limit:
+            take(self._rows[self._by_name[n]] for n in difflib.get_close_matches(text, list(self._by_name), n=limit, cutoff=0.5))
+        return out
+
+
+def _pick(record, keys):
+    return next((str(record[k]).strip() for k in keys if record.get(k)), "")
+
+
+def fetch_english_names():
+    # 代碼 -> 英文簡稱；某個來源抓不到就略過 (保留舊 CSV 的英文名)
+    import requests
+    names = {}
+    for url in PROFILE_APIS:
+        try: records = requests.get(url, timeout=30).json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"略過英文名稱來源 {url}: {e}"); continue
+        for r in records:
+            code, name_en = _pick(r, PROFILE_CODE_KEYS), _pick(r, PROFILE_NAME_EN_KEYS)
+            if code and name_en: names[code] = name_en
+    return names
+
+
+def load_csv(csv_path=CSV_PATH):
+    try:
+        with open(csv_path, newline="", encoding="utf-8") as f: return {r["code"]: r for r in csv.DictReader(f)}
+    except OSError: return {}
+
+
+def fetch_isin_snapshot(csv_path=CSV_PATH):
+    # 證交所 ISIN 頁面是 MS950 編碼的 HTML 表格，第一欄為「代號　名稱」
+    import requests
+    old, names_en = load_csv(csv_path), fetch_english_names()
+    rows = []
+    for market, url in ISIN_PAGES.items():
+        html = requests.get(url, timeout=30).content.decode("cp950", errors="ignore")
+        section = None
+        for tr in re.findall(r"<tr>(.*?)</tr>", html, flags=re.S):
+            cells = [re.sub(r"<[^>]+>", "", c).strip() for c in re.findall(r"<td[^>]*>(.*?)</td>", tr, flags=re.S)]
+            if len(cells) == 1:
+                section = cells[0].strip(); continue
+            if not (section or "").startswith(ISIN_SECTIONS) or len(cells) < 5 or "　" not in cells[0]: continue
+            code, name = cells[0].split("　", 1)
+            code = code.strip()
+            name_en = names_en.get(code) or (old.get(code) or {}).get("name_en", "")
+            rows.append((code, name.replace("*", "").strip(), name_en, market, cells[4] or section))
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f); w.writerow(COLUMNS); w.writerows(rows)
+    return len(rows)
+
+
+symbol_index = SymbolIndex()
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    if cmd == "fetch":
+        print(f"寫入 {fetch_isin_snapshot()} 筆 -> {CSV_PATH}"); build_db()
+    elif cmd == "import" and len(sys.argv) > 2:
+        shutil.copyfile(sys.argv[2], CSV_PATH); build_db(); print(f"已匯入 {sys.argv[2]} -> {DB_PATH}")
+    else:
+        print("用法: python symbols.py fetch | import <csv>")
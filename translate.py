@@ -0,0 +1,96 @@
+# --- 翻譯服務：整批翻譯 + 磁碟快取 (以原文為 key) + 背景執行 ---
+# 畫面一律先顯示原文，翻譯好之後下一次重跑才換上中文，不會拖慢頁面。
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from deep_translator import GoogleTranslator
+
+from config import CACHE_DIR
+from metrics import registry as metrics
+
+DB_PATH = os.path.join(CACHE_DIR, "translations.sqlite")
+BATCH_CHARS = 4500  # Google 翻譯單次上限 5000 字，多段文字用換行串成一次請求
+CJK = re.compile(r"[一-鿿]")
+LATIN = re.compile(r"[A-Za-z]")
+COMPANY_SUFFIX = re.compile(r"(股份)?有限公司$|公司$")
+
+
+def needs_translation(text):
+    # 沒有中文、且大部分是英文字母的才翻
+    text = str(text or "")
+    return not CJK.search(text) and len(LATIN.findall(text)) >= max(3, len(text) // 3)
+
+
+def chunks(texts, limit=BATCH_CHARS):
+    batch, size = [], 0
+    for t in texts:
+        if batch and size + len(t) + 1 > limit:
+            yield batch
+            batch, size = [], 0
+        batch.append(t); size += len(t) + 1
+    if batch: yield batch
+
+
+class Translator:
+    def __init__(self, path=DB_PATH, target="zh-TW"):
+        self.target = target
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute("CREATE TABLE IF NOT EXISTS translations (target TEXT, src TEXT, text TEXT, PRIMARY KEY (target, src)) WITHOUT ROWID")
+        self._lock = threading.Lock()
+        self._memo = dict(self._con.execute("SELECT src, text FROM translations WHERE target = ?", (target,)).fetchall())
+        self._pending = set()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="translate")
+
+    def lookup(self, texts):
+        # 立即回傳：已翻過的給譯文，其他先給原文並排進背景翻譯
+        texts = [str(t or "") for t in texts]
+        out, todo, hits, misses = [], [], 0, 0
+        with self._lock:
+            for t in texts:
+                hit = self._memo.get(t)
+                out.append(hit or t)
+                if hit is not None: hits += 1
+                elif needs_translation(t):
+                    misses += 1
+                    if t not in self._pending: self._pending.add(t); todo.append(t)
+        metrics.cache("translations", True, hits)
+        metrics.cache("translations", False, misses)
+        if todo: self._pool.submit(self._translate, todo)
+        return out
+
+    def get(self, text):
+        return self.lookup([text])[0]
+
+    def company_names(self, english):
+        # yfinance 英文全名 -> 中文簡稱；還沒翻好先用英文第一個字 (跟以前一樣)
+        english = [str(e or "") for e in english]
+        return [COMPANY_SUFFIX.sub("", zh).strip() or zh if zh != en else en.split(" ")[0]
+                for en, zh in zip(english, self.lookup(english))]
+
+    def _translate_chunk(self, batch):
+        engine = GoogleTranslator(source="auto", target=self.target)
+        metrics.upstream("translate", sum(len(t.encode("utf-8")) for t in batch))
+        parts = (engine.translate("\n".join(batch)) or "").split("\n")
+        # 換行數對不上 (翻譯把句子合併了) 時改成逐句翻
+        if len(parts) != len(batch): parts = engine.translate_batch(batch)
+        return dict(zip(batch, (p.strip() if p else None for p in parts)))
+
+    def _translate(self, texts):
+        try:
+            for batch in chunks(list(dict.fromkeys(texts))):
+                try:
+                    with metrics.timer("translate_batch"): done = {s: t for s, t in self._translate_chunk(batch).items() if t}
+                except Exception: continue
+                with self._lock:
+                    self._memo.update(done)
+                    self._con.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?)", [(self.target, s, t) for s, t in done.items()])
+                    self._con.commit()
+        finally:
+            with self._lock: self._pending.difference_update(texts)
+
+
+translator = Translator()